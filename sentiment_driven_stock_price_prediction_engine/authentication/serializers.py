@@ -35,6 +35,8 @@ logger = logging.getLogger(__name__)
 # Constants
 USERNAME_REGEX = r'^[a-zA-Z0-9_]{3,30}$'
 USERNAME_HELP_TEXT = "3-30 characters, letters, numbers, and underscores only."
+# Compiled once; validate_symbol_list runs it for every watchlist entry
+WATCHLIST_SYMBOL_RE = re.compile(r'[A-Z0-9.]{1,10}')
 
 
 # ============================================================================
@@ -73,7 +75,7 @@ def validate_symbol_list(value: list) -> list:
     for symbol in value:
         symbol = symbol.upper().strip()
         # Basic validation: alphanumeric, 1-10 characters
-        if not symbol or len(symbol) > 10 or not re.match(r'^[A-Z0-9.]{1,10}$', symbol):
+        if not WATCHLIST_SYMBOL_RE.fullmatch(symbol):
             raise serializers.ValidationError(
                 f"Invalid symbol '{symbol}'. Symbols must be 1-10 alphanumeric characters."
             )
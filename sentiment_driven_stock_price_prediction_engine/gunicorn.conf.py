@@ -8,4 +8,12 @@ bind = "0.0.0.0:8000"
 timeout = 120  # Increased timeout
 keepalive = 120
 max_requests = 500  # Restart workers periodically
-max_requests_jitter = 50
\ No newline at end of file
+max_requests_jitter = 50
+
+def post_worker_init(worker):
+    # Opt-in: pay model load / torch.compile cost at boot instead of on the
+    # first request
+    import os
+    if os.environ.get("FINBERT_WARMUP") == "1":
+        from news.utils import warmup_model
+        warmup_model()
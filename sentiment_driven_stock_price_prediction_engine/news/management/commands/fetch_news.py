@@ -1,10 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from django.core.management.base import BaseCommand
-from news.tasks import fetch_news  # Import the Celery task
+from news.models import StockSymbol
+from news.tasks import fetch_and_save_news
 
 class Command(BaseCommand):
     help = "Fetch news articles and analyze sentiment"
 
-    def handle(self, *args, **kwargs):
-        # Trigger the Celery task
-        fetch_news.delay()
-        self.stdout.write(self.style.SUCCESS("News fetching task triggered."))
\ No newline at end of file
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Symbols fetched concurrently (keep within provider rate limits)'
+        )
+
+    def handle(self, *args, **options):
+        # No Celery worker: run the pipeline inline, a few symbols at a time.
+        # Each call is mostly waiting on upstream HTTP and opens/closes its
+        # own DB connection, so threads overlap the network latency.
+        symbols = list(StockSymbol.active_symbols().values_list("symbol", flat=True))
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            for symbol, result in zip(symbols, pool.map(fetch_and_save_news, symbols)):
+                self.stdout.write(f"{symbol}: {result.get('status')} ({result.get('new_articles', 0)} new)")
+        self.stdout.write(self.style.SUCCESS("News fetching complete."))
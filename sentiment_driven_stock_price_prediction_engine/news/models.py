@@ -45,6 +45,8 @@ class ProcessedNews(models.Model):
     source_reliability = models.IntegerField(default=70, validators=[MinValueValidator(0), MaxValueValidator(100)])
     banner_image_url = models.URLField(max_length=500, blank=True, default="")
     raw_data = models.JSONField(default=dict)
+    # 64-bit digest of "title summary"; lets a refresh reuse an earlier score
+    content_hash = models.BigIntegerField(null=True, blank=True, db_index=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -54,6 +56,10 @@ class ProcessedNews(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['title_hash', 'symbol'], name='unique_article_per_symbol'),
         ]
+        indexes = [
+            # Latest-N-per-symbol queries become an index range scan + LIMIT
+            models.Index(fields=['symbol', '-published_at'], name='processednews_sym_pub_idx'),
+        ]
 
     @property
     def source(self) -> str:
@@ -72,6 +78,11 @@ class ProcessedNews(models.Model):
         base = f"{self._normalize_title(self.title)}_{ts}"
         return hashlib.sha256(base.encode("utf-8")).hexdigest()
 
+    @staticmethod
+    def compute_content_hash(text: str) -> int:
+        digest = hashlib.blake2b((text or "").encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big", signed=True)
+
     def save(self, *args, **kwargs):
         if not self.symbol or not self.title:
             raise ValidationError("Symbol and title are required.")
@@ -137,7 +148,10 @@ class SymbolSearchCache(models.Model):
     class Meta:
         verbose_name = 'Symbol Search Cache'
         verbose_name_plural = 'Symbol Search Caches'
-        indexes = [models.Index(fields=['expires_at', 'query'])]
+        indexes = [
+            models.Index(fields=['expires_at', 'query']),
+            models.Index(fields=['query', 'expires_at']),
+        ]
         ordering = ['-created_at']
 
     def save(self, *args, **kwargs):
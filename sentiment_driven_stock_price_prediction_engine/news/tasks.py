@@ -1,70 +1,107 @@
+"""
+News pipeline – fetch articles from the configured providers, score them with
+FinBERT and persist them as ProcessedNews rows. The functions here are plain
+callables, not Celery tasks: the views and the fetch_news management command
+call them inline. celery_app.py only configures a worker for deployments
+that run one.
+"""
+
 from __future__ import annotations
 
-import gc
 import hashlib
 import logging
 import os
 import re
 from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
 import dateutil.parser
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
-from django.db import IntegrityError, transaction, close_old_connections
+from django.core.cache import cache
+from django.db import transaction, close_old_connections
 from django.utils import timezone
 
-from .models import ProcessedNews, StockSymbol
-from .utils import analyze_sentiment
+from sentiment_driven_stock_price_prediction_engine.renderers import loads_json
+
+from .models import ProcessedNews
+from .utils import analyze_batch, analyze_sentiment
 
 logger = logging.getLogger(__name__)
 task_logger = logging.getLogger(__name__)
 
-API_TIMEOUT = 15
-MAX_ARTICLES = 100
-BATCH_SIZE = 25
+MAX_ARTICLES = 50
+# (connect, read): dead hosts fail fast, slow ones are bounded by the read timeout
+API_TIMEOUT = (2, 6)
+PROVIDER_COOLDOWN_SECONDS = 60
+_RATE_LIMIT_HEADERS = ("X-RateLimit-Requests-Remaining", "X-RateLimit-Remaining")
+BATCH_SIZE = 100
 RECENT_HOURS_DEFAULT = 24
-
-LOG_FILE = os.path.join(getattr(settings, "BASE_DIR", "."), "logs", "news_fetch_log.txt")
-
-_AV_TIME_FORMATS = ("%Y%m%dT%H%M%S", "%Y%m%dT%H%M")
+USER_AGENT = "sentiment-news-worker/1.0"
 _STOPWORDS = {
     "the", "and", "for", "with", "that", "this", "from", "into", "your", "you", "are",
     "was", "were", "will", "has", "have", "had", "its", "their", "they", "them",
 }
-USER_AGENT = "sentiment-news-worker/1.0"
-
+_AV_TIME_FORMATS = ("%Y%m%dT%H%M%S", "%Y%m%dT%H%M")
+# Alpha Vantage refreshes ask only for articles since the previous fetch
+# (minus a small overlap; repeats are dropped by the title_hash dedupe)
+AV_LAST_FETCH_TTL = 86400
+AV_FETCH_OVERLAP = timedelta(minutes=5)
+_TRUSTED_SOURCES = {
+    "financial times": 90, "bloomberg": 95, "reuters": 85,
+    "yahoo finance": 80, "wsj": 90, "wall street journal": 90,
+}
 
+# Shared keep-alive session so upstream calls reuse TCP/TLS connections
+_SESSION = requests.Session()
+_SESSION.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"})
+_ADAPTER = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
 def _write_log(message: str) -> None:
+    """Write a log entry to a file (for debugging)."""
+    log_file = os.path.join(getattr(settings, "BASE_DIR", "."), "logs", "news_fetch_log.txt")
     try:
-        os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        with open(log_file, "a", encoding="utf-8") as f:
             f.write(f"{datetime.now(dt_timezone.utc).isoformat()} - {message}\n")
     except Exception:
         pass
 
-
 def normalize_title(title: str) -> str:
+    """Normalize a title for deduplication."""
     return re.sub(r"[^\w\s]", "", (title or "").strip().lower())
 
-
 def extract_key_phrases(text: str) -> List[str]:
+    """Extract important bigrams from text."""
     if not text:
         return []
     words = re.findall(r"[A-Za-z]{3,}", text.lower())
     if len(words) < 6:
         return []
-    bigrams = [" ".join((words[i], words[i + 1])) for i in range(len(words) - 1)]
+    # Stopword check on the head token before building the bigram string,
+    # rather than joining every pair and splitting it back apart
     freq: Dict[str, int] = {}
-    for bg in bigrams:
-        head = bg.split()[0]
+    for head, tail in zip(words, words[1:]):
         if head in _STOPWORDS:
             continue
+        bg = f"{head} {tail}"
         freq[bg] = freq.get(bg, 0) + 1
     return [k for k, _ in sorted(freq.items(), key=lambda kv: kv[1], reverse=True)[:5]]
 
-
 def _parse_date(article: Dict[str, Any]) -> Optional[datetime]:
+    """Parse various date formats into a timezone-aware datetime."""
     value = (
         article.get("time_published")
         or article.get("datetime")
@@ -75,7 +112,6 @@ def _parse_date(article: Dict[str, Any]) -> Optional[datetime]:
     )
     if not value:
         return None
-
     try:
         if isinstance(value, int):
             return datetime.fromtimestamp(value, tz=dt_timezone.utc)
@@ -91,7 +127,12 @@ def _parse_date(article: Dict[str, Any]) -> Optional[datetime]:
                     return dt.replace(tzinfo=dt_timezone.utc)
                 except ValueError:
                     continue
-            dt = dateutil.parser.parse(value)
+            # ISO 8601 (Yahoo/Finnhub) before falling back to dateutil's
+            # much slower format probing
+            try:
+                dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                dt = dateutil.parser.parse(value)
             if timezone.is_naive(dt):
                 return timezone.make_aware(dt, dt_timezone.utc)
             return dt.astimezone(dt_timezone.utc)
@@ -100,20 +141,10 @@ def _parse_date(article: Dict[str, Any]) -> Optional[datetime]:
         logger.warning("Date parse failed: %s", value)
         return None
 
-
+@lru_cache(maxsize=1024)
 def get_source_reliability(name: str) -> int:
-    trusted = {
-        "financial times": 90,
-        "bloomberg": 95,
-        "reuters": 85,
-        "yahoo finance": 80,
-        "wsj": 90,
-        "wall street journal": 90,
-    }
-    if not name:
-        return 70
-    return trusted.get(name.strip().lower(), 70)
-
+    """Return a reliability score for a news source."""
+    return _TRUSTED_SOURCES.get((name or "").strip().casefold(), 70)
 
 def _safe_float(x: Any, default: float = 0.0) -> float:
     try:
@@ -121,23 +152,33 @@ def _safe_float(x: Any, default: float = 0.0) -> float:
     except Exception:
         return default
 
-
-def _standardize_article(symbol: str, raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def _article_text(raw: Dict[str, Any]) -> Tuple[str, str]:
+    """Return the (title, summary) pair used for storage and sentiment."""
     title = (raw.get("title") or raw.get("headline") or raw.get("description") or "").strip()
+    summary = (raw.get("summary") or raw.get("content") or raw.get("snippet") or "").strip()
+    return title, summary
+
+def _standardize_article(
+    symbol: str,
+    raw: Dict[str, Any],
+    sentiment: Optional[Dict[str, Any]] = None,
+    published_at: Optional[datetime] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Convert raw article data into a standardised dict ready for DB.
+    Pass `sentiment` when it was already scored in a batch, and
+    `published_at` when the date was already parsed.
+    """
+    title, summary = _article_text(raw)
     if not title:
         return None
-
-    published_at = _parse_date(raw)
+    if published_at is None:
+        published_at = _parse_date(raw)
     if not published_at:
         return None
-
-    summary = (raw.get("summary") or raw.get("content") or raw.get("snippet") or "").strip()
-
     provider = (raw.get("provider") or raw.get("source") or raw.get("publisher") or "other").strip()
     source_name = (raw.get("source_name") or raw.get("publisher") or raw.get("source") or provider).strip()
-
     url = raw.get("url") or raw.get("link") or raw.get("canonicalUrl") or ""
-
     banner_image_url = (
         raw.get("banner_image_url")
         or raw.get("banner_image")
@@ -145,21 +186,18 @@ def _standardize_article(symbol: str, raw: Dict[str, Any]) -> Optional[Dict[str,
         or ""
     )
     if not banner_image_url and isinstance(raw.get("thumbnail"), dict):
-        resolutions = raw.get("thumbnail", {}).get("resolutions") or []
+        resolutions = raw["thumbnail"].get("resolutions") or []
         if resolutions and isinstance(resolutions[0], dict):
             banner_image_url = resolutions[0].get("url") or ""
-
     title_norm = normalize_title(title)
     rounded_ts = int(round(published_at.timestamp() / 60) * 60)
     title_hash = hashlib.sha256(f"{title_norm}_{rounded_ts}".encode("utf-8")).hexdigest()
-
     combined_text = f"{title} {summary}".strip()
-    sentiment = analyze_sentiment(combined_text) or {}
+    if sentiment is None:
+        sentiment = analyze_sentiment(combined_text) or {}
     label = (sentiment.get("label") or "neutral").lower()
     score = _safe_float(sentiment.get("score"), 0.0)
-
     key_phrases = extract_key_phrases(combined_text)
-
     return {
         "symbol": symbol,
         "title_hash": title_hash,
@@ -175,53 +213,108 @@ def _standardize_article(symbol: str, raw: Dict[str, Any]) -> Optional[Dict[str,
         "key_phrases": ", ".join(key_phrases),
         "source_reliability": get_source_reliability(source_name or provider),
         "banner_image_url": banner_image_url[:500],
-        "raw_data": raw,
+        "content_hash": ProcessedNews.compute_content_hash(combined_text),
     }
 
-
-def _filter_recent(raw_articles: List[Dict[str, Any]], hours: int) -> List[Dict[str, Any]]:
+def _filter_recent(
+    raw_articles: List[Dict[str, Any]], hours: int
+) -> Tuple[List[Dict[str, Any]], List[datetime]]:
+    """Keep only articles newer than `hours`, with their parsed publish times."""
     cutoff = timezone.now() - timedelta(hours=hours)
     kept: List[Dict[str, Any]] = []
+    kept_dates: List[datetime] = []
     for a in raw_articles:
         dt = _parse_date(a)
         if dt and dt >= cutoff:
             kept.append(a)
-    return kept
-
-
-def _upsert_articles(symbol: str, raw_articles: List[Dict[str, Any]]) -> Tuple[int, int]:
-    new_count = 0
-    dup_or_updated = 0
-
-    for i in range(0, len(raw_articles), BATCH_SIZE):
-        batch = raw_articles[i : i + BATCH_SIZE]
-        for raw in batch:
-            std = _standardize_article(symbol, raw)
-            if not std:
-                continue
-            lookup = {"symbol": symbol, "title_hash": std["title_hash"]}
-            defaults = {k: v for k, v in std.items() if k not in ("symbol", "title_hash")}
-            try:
-                with transaction.atomic():
-                    _, created = ProcessedNews.objects.update_or_create(
-                        **lookup,
-                        defaults=defaults,
-                    )
-                if created:
-                    new_count += 1
-                else:
-                    dup_or_updated += 1
-            except IntegrityError:
-                dup_or_updated += 1
-            except Exception as e:
-                task_logger.warning("Upsert failed for %s: %s", symbol, e)
-        del batch
-        gc.collect()
-    return new_count, dup_or_updated
-
+            kept_dates.append(dt)
+    return kept, kept_dates
+
+def _build_news_obj(std: Dict[str, Any]) -> Optional[ProcessedNews]:
+    """
+    Build an unsaved ProcessedNews applying the same rules as
+    ProcessedNews.save(), which bulk_create() bypasses.
+    """
+    obj = ProcessedNews(**std)
+    if obj.published_at > timezone.now():
+        return None
+    obj.title_hash = obj._compute_title_hash()
+    if obj.sentiment == "positive":
+        obj.sentiment_score = abs(float(obj.confidence))
+    elif obj.sentiment == "negative":
+        obj.sentiment_score = -abs(float(obj.confidence))
+    else:
+        obj.sentiment_score = 0.0
+    return obj
+
+def _upsert_articles(
+    symbol: str,
+    raw_articles: List[Dict[str, Any]],
+    published: Optional[List[datetime]] = None,
+) -> Tuple[int, int]:
+    """
+    Insert new articles in DB with a single bulk INSERT; articles already
+    stored (same title_hash/symbol) are skipped. `published` carries publish
+    times already parsed by _filter_recent so each date is parsed once.
+    Returns (new_count, duplicate_count); a failed insert raises.
+    """
+    if published is None:
+        published = [None] * len(raw_articles)
+    texts = [" ".join(_article_text(raw)).strip() for raw in raw_articles]
+
+    # Text already scored on an earlier refresh (any symbol) reuses that
+    # score; everything else goes through one batched forward pass
+    hashes = [ProcessedNews.compute_content_hash(t) for t in texts]
+    known = {
+        h: {"label": label, "score": confidence}
+        for h, label, confidence in ProcessedNews.objects.filter(content_hash__in=set(hashes))
+        .values_list("content_hash", "sentiment", "confidence")
+    }
+    to_score = [i for i, h in enumerate(hashes) if h not in known]
+    sentiments: List[Optional[Dict[str, Any]]] = [known.get(h) for h in hashes]
+    for i, result in zip(to_score, analyze_batch([texts[i] for i in to_score])):
+        sentiments[i] = result
+
+    news_objs: Dict[str, ProcessedNews] = {}
+    for raw, sentiment, published_at in zip(raw_articles, sentiments, published):
+        std = _standardize_article(symbol, raw, sentiment=sentiment, published_at=published_at)
+        if not std:
+            continue
+        obj = _build_news_obj(std)
+        if obj is not None:
+            news_objs.setdefault(obj.title_hash, obj)
+    if not news_objs:
+        return 0, 0
+
+    existing = set(
+        ProcessedNews.objects.filter(symbol=symbol, title_hash__in=list(news_objs))
+        .values_list("title_hash", flat=True)
+    )
+    to_insert = [obj for h, obj in news_objs.items() if h not in existing]
+    with transaction.atomic():
+        ProcessedNews.objects.bulk_create(to_insert, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return len(to_insert), len(raw_articles) - len(to_insert)
+
+# ------------------------------------------------------------
+# API Fetchers
+# ------------------------------------------------------------
+def _provider_disabled(provider: str) -> bool:
+    return bool(cache.get(f"provider_disabled:{provider}"))
+
+def _note_rate_limit(provider: str, response: requests.Response) -> None:
+    """Pause a provider for a minute once it reports an exhausted quota."""
+    for header in _RATE_LIMIT_HEADERS:
+        remaining = response.headers.get(header)
+        if remaining is not None and remaining.strip() == "0":
+            cache.set(f"provider_disabled:{provider}", True, PROVIDER_COOLDOWN_SECONDS)
+            return
+
+def _av_last_key(symbol: str) -> str:
+    return f"av:last:{symbol}"
 
-# ---- Fetchers ----
 def _fetch_alpha_vantage(session: requests.Session, symbol: str) -> List[Dict[str, Any]]:
+    if _provider_disabled("alpha_vantage"):
+        return []
     params = {
         "function": "NEWS_SENTIMENT",
         "tickers": symbol,
@@ -229,9 +322,13 @@ def _fetch_alpha_vantage(session: requests.Session, symbol: str) -> List[Dict[st
         "limit": 50,
         "sort": "LATEST",
     }
+    last_fetch = cache.get(_av_last_key(symbol))
+    if last_fetch:
+        params["time_from"] = last_fetch
     r = session.get("https://www.alphavantage.co/query", params=params, timeout=API_TIMEOUT)
+    _note_rate_limit("alpha_vantage", r)
     r.raise_for_status()
-    data = r.json() or {}
+    data = loads_json(r.content) or {}
     if "Note" in data or "Information" in data:
         raise ValueError(data.get("Note") or data.get("Information"))
     if "feed" not in data:
@@ -242,8 +339,9 @@ def _fetch_alpha_vantage(session: requests.Session, symbol: str) -> List[Dict[st
         out.append({"banner_image_url": a.get("banner_image", ""), **a})
     return out
 
-
 def _fetch_finnhub(session: requests.Session, symbol: str) -> List[Dict[str, Any]]:
+    if _provider_disabled("finnhub"):
+        return []
     today = datetime.now(dt_timezone.utc).date()
     seven_days_ago = today - timedelta(days=7)
     r = session.get(
@@ -256,6 +354,7 @@ def _fetch_finnhub(session: requests.Session, symbol: str) -> List[Dict[str, Any
         },
         timeout=API_TIMEOUT,
     )
+    _note_rate_limit("finnhub", r)
     r.raise_for_status()
     items = r.json() or []
     out: List[Dict[str, Any]] = []
@@ -263,8 +362,9 @@ def _fetch_finnhub(session: requests.Session, symbol: str) -> List[Dict[str, Any
         out.append({"banner_image_url": a.get("image", ""), **a})
     return out
 
-
 def _fetch_yahoo_rapidapi(session: requests.Session, symbol: str) -> List[Dict[str, Any]]:
+    if _provider_disabled("yahoo"):
+        return []
     headers = {
         "X-RapidAPI-Key": settings.RAPIDAPI_KEY,
         "X-RapidAPI-Host": settings.RAPIDAPI_HOST,
@@ -275,6 +375,7 @@ def _fetch_yahoo_rapidapi(session: requests.Session, symbol: str) -> List[Dict[s
         headers=headers,
         timeout=API_TIMEOUT,
     )
+    _note_rate_limit("yahoo", r)
     r.raise_for_status()
     data = r.json() or {}
     articles = data.get("items") or data.get("news") or []
@@ -283,14 +384,16 @@ def _fetch_yahoo_rapidapi(session: requests.Session, symbol: str) -> List[Dict[s
         out.append(a)
     return out
 
-
-# ---- Core Public Function (sync) ----
+# ------------------------------------------------------------
+# Core synchronous fetch function
+# ------------------------------------------------------------
 def fetch_and_save_news(
     symbol: str,
     fetch_latest_only: bool = True,
     recent_hours: int = RECENT_HOURS_DEFAULT,
     timeout_seconds: int = 30,
 ) -> Dict[str, Any]:
+    """Fetch news from external APIs and store in DB."""
     close_old_connections()
     symbol = (symbol or "").strip().upper()
     if not symbol:
@@ -302,50 +405,62 @@ def fetch_and_save_news(
             task_logger.info("Cache hit for %s (last %sh)", symbol, recent_hours)
             return {"status": "success", "new_articles": 0, "duplicates": 0, "cache_hit": True}
 
-        with requests.Session() as session:
-            session.headers.update({"User-Agent": USER_AGENT})
-            session.timeout = timeout_seconds
-
-            fetchers = []
-            if getattr(settings, "ALPHA_VANTAGE_KEY", None):
-                fetchers.append(_fetch_alpha_vantage)
-            if getattr(settings, "FINNHUB_API_KEY", None):
-                fetchers.append(_fetch_finnhub)
-            if getattr(settings, "RAPIDAPI_KEY", None) and getattr(settings, "RAPIDAPI_HOST", None):
-                fetchers.append(_fetch_yahoo_rapidapi)
-
-            last_err: Optional[Exception] = None
-            raw_articles: List[Dict[str, Any]] = []
-
-            for fetch in fetchers:
-                try:
-                    raw_articles = fetch(session, symbol)
-                    if raw_articles:
-                        break
-                except Exception as e:
-                    last_err = e
-                    task_logger.warning("API fetch failed (%s): %s", fetch.__name__, e)
-
-            if not raw_articles:
-                msg = f"No articles fetched for {symbol}"
-                if last_err:
-                    msg += f" (last_err={last_err})"
-                return {"status": "error", "message": msg}
-
-            if fetch_latest_only:
-                raw_articles = _filter_recent(raw_articles, hours=recent_hours)
-
-            new_count, dup_count = _upsert_articles(symbol, raw_articles)
-            _write_log(f"{symbol}: new={new_count} dup={dup_count} fetched={len(raw_articles)}")
-
-            return {
-                "status": "success",
-                "symbol": symbol,
-                "fetched": len(raw_articles),
-                "new_articles": new_count,
-                "duplicates": dup_count,
-                "cache_hit": False,
-            }
+        fetchers = []
+        if getattr(settings, "ALPHA_VANTAGE_KEY", None):
+            fetchers.append(_fetch_alpha_vantage)
+        if getattr(settings, "FINNHUB_API_KEY", None):
+            fetchers.append(_fetch_finnhub)
+        if getattr(settings, "RAPIDAPI_KEY", None) and getattr(settings, "RAPIDAPI_HOST", None):
+            fetchers.append(_fetch_yahoo_rapidapi)
+
+        last_err: Optional[Exception] = None
+        raw_articles: List[Dict[str, Any]] = []
+
+        # Alpha Vantage watermark for this fetch; only stored once the
+        # articles it returned have been written
+        fetch_started = datetime.now(dt_timezone.utc) - AV_FETCH_OVERLAP
+        source = None
+        # Providers in priority order; a lower one is only called (and its
+        # quota spent) when everything above it failed or came back empty
+        for fetch in fetchers:
+            try:
+                raw_articles = fetch(_SESSION, symbol)
+                if raw_articles:
+                    source = fetch
+                    break
+            except Exception as e:
+                last_err = e
+                task_logger.warning("API fetch failed (%s): %s", fetch.__name__, e)
+
+        if not raw_articles:
+            msg = f"No articles fetched for {symbol}"
+            if last_err:
+                msg += f" (last_err={last_err})"
+            return {"status": "error", "message": msg}
+
+        published = None
+        if fetch_latest_only:
+            raw_articles, published = _filter_recent(raw_articles, hours=recent_hours)
+
+        try:
+            new_count, dup_count = _upsert_articles(symbol, raw_articles, published)
+        except Exception as e:
+            task_logger.warning("Bulk insert failed for %s: %s", symbol, e)
+            return {"status": "error", "message": f"Failed to store articles for {symbol}"}
+        if source is _fetch_alpha_vantage:
+            cache.set(_av_last_key(symbol), fetch_started.strftime("%Y%m%dT%H%M"), AV_LAST_FETCH_TTL)
+        if new_count:
+            cache.delete(_news_cache_key(symbol))
+        _write_log(f"{symbol}: new={new_count} dup={dup_count} fetched={len(raw_articles)}")
+
+        return {
+            "status": "success",
+            "symbol": symbol,
+            "fetched": len(raw_articles),
+            "new_articles": new_count,
+            "duplicates": dup_count,
+            "cache_hit": False,
+        }
 
     except MemoryError:
         task_logger.critical("Memory exhausted during processing for %s", symbol)
@@ -354,5 +469,10 @@ def fetch_and_save_news(
         task_logger.error("Unexpected error for %s: %s", symbol, e)
         return {"status": "error", "message": str(e)}
     finally:
+        # No gc.collect() here: a full collection walks the whole FinBERT
+        # graph on every call; gunicorn's max_requests recycles the worker
         close_old_connections()
-        gc.collect()
\ No newline at end of file
+
+
+def _news_cache_key(symbol: str) -> str:
+    return f"news:{symbol}"
@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import torch
+from django.test import SimpleTestCase
+
+from news import utils
+
+
+class _Encoding(dict):
+    def to(self, device):
+        return self
+
+
+class _FakeTokenizer:
+    """Encodes each text as a single token: its length."""
+    pad_token_id = 0
+
+    def __call__(self, texts, return_tensors='pt', **kwargs):
+        batch = [texts] if isinstance(texts, str) else list(texts)
+        ids = np.array([[len(t)] for t in batch], dtype=np.int64)
+        if return_tensors == 'np':
+            return {'input_ids': ids, 'attention_mask': np.ones_like(ids)}
+        ids = torch.from_numpy(ids)
+        return _Encoding(input_ids=ids, attention_mask=torch.ones_like(ids))
+
+
+class _FakeModel:
+    """Class = text length % 3, with a length-dependent confidence; counts rows scored."""
+    _id2label_lower = ('negative', 'neutral', 'positive')
+
+    def __init__(self):
+        self.rows_scored = 0
+
+    def __call__(self, input_ids, attention_mask):
+        self.rows_scored += input_ids.shape[0]
+        lengths = input_ids[:, 0]
+        logits = torch.nn.functional.one_hot(lengths % 3, 3).float() * (1 + lengths.float() / 100)
+        return SimpleNamespace(logits=logits)
+
+
+class AnalyzeBatchTests(SimpleTestCase):
+    def setUp(self):
+        self.model = _FakeModel()
+        patches = [
+            mock.patch.object(utils, '_MODEL', self.model),
+            mock.patch.object(utils, '_TOKENIZER', _FakeTokenizer()),
+            mock.patch.dict(utils.config, {'batch_size': 2, 'min_text_length': 20}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        utils._tokenize.cache_clear()
+        self.addCleanup(utils._tokenize.cache_clear)
+
+    def test_matches_per_text_analysis(self):
+        texts = [
+            "Shares rallied after the earnings beat",
+            "Regulators opened a probe into the lender",
+            "Shares rallied after the earnings beat",
+            "too short",
+            "Guidance was left unchanged for the quarter",
+            "  Regulators opened a probe into the lender  ",
+        ]
+        batched = utils.analyze_batch(texts)
+        single = [utils.analyze_sentiment(text) for text in texts]
+        self.assertEqual([r['label'] for r in batched], [r['label'] for r in single])
+        for got, expected in zip(batched, single):
+            self.assertAlmostEqual(got['score'], expected['score'], places=6)
+
+    def test_duplicates_scored_once_and_scattered(self):
+        text = "Shares rallied after the earnings beat"
+        results = utils.analyze_batch([text, "tiny", text, text])
+        self.assertEqual(self.model.rows_scored, 1)
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(results[0], results[3])
+        self.assertEqual(results[1], {'label': 'neutral', 'score': 0.0})
+        # Slots are independent dicts, not one shared object
+        self.assertIsNot(results[0], results[2])
+
+    def test_multi_sentence_texts_pool_like_analyze_sentiment(self):
+        texts = [
+            "Shares rallied after the earnings beat. Regulators opened a probe into the bank.",
+            "Guidance was left unchanged for the quarter! Analysts cut their targets. Ok.",
+            "Shares rallied after the earnings beat",
+        ]
+        batched = utils.analyze_batch(texts)
+        # Five distinct sentences; "Ok." is below min_text_length
+        self.assertEqual(self.model.rows_scored, 5)
+        single = [utils.analyze_sentiment(text) for text in texts]
+        self.assertEqual([r['label'] for r in batched], [r['label'] for r in single])
+        for got, expected in zip(batched, single):
+            self.assertAlmostEqual(got['score'], expected['score'], places=6)
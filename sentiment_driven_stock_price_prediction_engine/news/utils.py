@@ -1,12 +1,29 @@
+import os
+
+# Cap BLAS/OpenMP pools before torch is imported so concurrent gunicorn
+# workers don't each spin up one thread per core.
+_WORKERS = max(1, int(os.environ.get('WEB_CONCURRENCY', 1)))
+_INTRA_THREADS = int(os.environ.get('FINBERT_INTRA_THREADS', max(1, (os.cpu_count() or 1) // _WORKERS)))
+os.environ.setdefault('OMP_NUM_THREADS', str(_INTRA_THREADS))
+os.environ.setdefault('MKL_NUM_THREADS', str(_INTRA_THREADS))
+
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import numpy as np
 import torch
 import logging
+import platform
+import re
 import time
 from django.conf import settings
 from copy import deepcopy
 from functools import lru_cache
 from typing import Union, List, Dict, Any
+try:
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    ORT_AVAILABLE = True
+except ImportError:
+    ORT_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
@@ -19,11 +36,37 @@ DEFAULT_CONFIG = {
     'load_retries': 3,
     'load_retry_delay': 2,
     'batch_size': 8,
-    'max_memory_mb': 1024  # 1GB memory limit – only used if CUDA available
+    'max_memory_mb': 1024,  # 1GB memory limit – only used if CUDA available
+    # CPU intra-op threads per worker; override with FINBERT_INTRA_THREADS
+    # (defaults to cpu_count // WEB_CONCURRENCY)
+    'intra_threads': _INTRA_THREADS,
+    # torch.compile(mode='reduce-overhead') on CUDA with PyTorch >= 2.1
+    'compile_model': True,
+    # Local state_dict snapshot that CPU workers mmap read-only, so every
+    # gunicorn worker shares one copy of the weights in the page cache
+    'weights_path': os.environ.get('FINBERT_WEIGHTS_PATH'),
+    # bfloat16 weights on CPUs with native bf16 matmul (AVX512-BF16 / AMX):
+    # half the resident bytes. 'auto' detects support; 'true'/'false' force it
+    'cpu_bf16': os.environ.get('FINBERT_CPU_BF16', 'auto'),
+    # Opt-in dynamic int8 Linear layers on CPU (fbgemm on x86, qnnpack on
+    # ARM): int8 GEMMs with VNNI, but scores shift slightly and the
+    # quantized weights are private per worker, not shared via weights_path.
+    # Takes precedence over cpu_bf16 when FINBERT_CPU_INT8=true
+    'cpu_int8': os.environ.get('FINBERT_CPU_INT8', 'false'),
+    # Fused ONNX export (scripts/export_finbert_onnx.py) served by ONNX
+    # Runtime on CPU instead of PyTorch eager; used when set and installed
+    'onnx_path': os.environ.get('FINBERT_ONNX_PATH'),
 }
 
 config = {**DEFAULT_CONFIG, **getattr(settings, 'FINBERT_CONFIG', {})}
 
+torch.set_num_threads(config['intra_threads'])
+try:
+    torch.set_num_interop_threads(1)
+except RuntimeError:
+    # Can only be set once, before any inter-op work has started
+    pass
+
 # ---- Device setup with memory awareness ----
 def get_device():
     """Returns the best available device (CUDA if enough memory, else CPU)."""
@@ -38,23 +81,139 @@ def get_device():
 
 device = get_device()
 
+# Single-sentence classification: token_type_ids are all zeros and BERT
+# defaults them when omitted, so don't ship them to the device.
+_TOKENIZE_KWARGS = {
+    'truncation': True,
+    'max_length': 512,
+    'return_attention_mask': True,
+    'return_token_type_ids': False,
+    'return_tensors': 'pt',
+}
+
+# Padded sequence lengths are rounded up to a multiple of this so a compiled
+# model only ever sees a few shapes (128/256/384/512)
+_SEQ_BUCKET = 128
+
+def _can_compile() -> bool:
+    if not config['compile_model'] or device.type != 'cuda' or not hasattr(torch, 'compile'):
+        return False
+    major, minor = (int(x) for x in torch.__version__.split('.')[:2])
+    return (major, minor) >= (2, 1)
+
 # ---- Model and tokenizer loading with caching ----
-@lru_cache(maxsize=1)
+# Process-wide singletons; stay None until a load succeeds so a failed load
+# is retried on the next call.
+_MODEL = None
+_TOKENIZER = None
+_WARMED = False
+
 def load_model():
+    """Return the cached model, loading it on first use."""
+    global _MODEL
+    if _MODEL is None:
+        _MODEL = _load_model()
+    return _MODEL
+
+def _quantized_engine():
+    """The int8 backend for this CPU, or None if int8 is off or unsupported."""
+    if device.type != 'cpu' or str(config['cpu_int8']).lower() not in ('1', 'true', 'yes'):
+        return None
+    machine = platform.machine().lower()
+    engine = 'qnnpack' if machine.startswith(('arm', 'aarch64')) else 'fbgemm'
+    return engine if engine in torch.backends.quantized.supported_engines else None
+
+def _quantize(model):
+    """Swap nn.Linear for dynamically quantized int8 Linear where supported."""
+    engine = _quantized_engine()
+    if engine is None:
+        return model
+    torch.backends.quantized.engine = engine
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def _model_dtype() -> torch.dtype:
+    """
+    float16 on CUDA; float32 when int8 quantization follows (it only takes
+    float32 Linear layers); bfloat16 on CPUs that run it natively; else float32.
+    """
+    if device.type == 'cuda':
+        return torch.float16
+    if _quantized_engine() is not None:
+        return torch.float32
+    setting = str(config['cpu_bf16']).lower()
+    if setting == 'auto':
+        try:
+            use_bf16 = torch.ops.mkldnn._is_mkldnn_bf16_supported()
+        except Exception:
+            use_bf16 = False
+    else:
+        use_bf16 = setting in ('1', 'true', 'yes')
+    return torch.bfloat16 if use_bf16 else torch.float32
+
+def _from_pretrained():
+    """
+    from_pretrained(), or on CPU with weights_path set, the same architecture
+    with its parameters swapped for mmap-backed tensors from the snapshot.
+    """
+    kwargs = {'torch_dtype': _model_dtype(), 'low_cpu_mem_usage': True}
+    try:
+        # Fused scaled_dot_product_attention kernel where the architecture has one
+        model = AutoModelForSequenceClassification.from_pretrained(
+            config['model_name'], attn_implementation='sdpa', **kwargs
+        )
+    except (ValueError, ImportError):
+        model = AutoModelForSequenceClassification.from_pretrained(config['model_name'], **kwargs)
+    path = config['weights_path']
+    if not path or device.type != 'cpu':
+        return model
+    try:
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            torch.save(model.state_dict(), tmp_path)
+            os.replace(tmp_path, path)  # atomic if workers race
+        state_dict = torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+        model.load_state_dict(state_dict, assign=True)
+    except Exception as e:
+        logger.warning(f"mmap weight load skipped: {str(e)}")
+    return model
+
+def _from_onnx():
+    """
+    The ONNX Runtime model from onnx_path, or None to use PyTorch. Takes and
+    returns torch tensors, so callers don't need to know which one they got.
+    """
+    path = config['onnx_path']
+    if not path or not ORT_AVAILABLE or device.type != 'cpu':
+        return None
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = config['intra_threads']
+    options.inter_op_num_threads = 1
+    return ORTModelForSequenceClassification.from_pretrained(
+        path, provider="CPUExecutionProvider", session_options=options
+    )
+
+def _load_model():
     """Load FinBERT model with memory‑efficient options."""
     for attempt in range(config['load_retries']):
         try:
             logger.info(f"Loading FinBERT (attempt {attempt+1}) on {device}")
-            model = AutoModelForSequenceClassification.from_pretrained(
-                config['model_name'],
-                torch_dtype=torch.float16 if device.type == 'cuda' else torch.float32,
-                low_cpu_mem_usage=True
-            )
-            model.to(device)
-            model.eval()
+            model = _from_onnx()
+            if model is None:
+                model = _from_pretrained()
+                model.to(device)
+                model.eval()
+                # Inference only; forward passes also run under inference_mode
+                for param in model.parameters():
+                    param.requires_grad_(False)
+                model = _quantize(model)
             # Ensure label mapping is correct
             if not hasattr(model.config, 'id2label') or all(l.startswith("LABEL") for l in model.config.id2label.values()):
                 model.config.id2label = {0: "negative", 1: "neutral", 2: "positive"}
+            # Lowercased labels indexed by class id, so the hot path is a tuple index
+            model._id2label_lower = tuple(model.config.id2label[i].lower() for i in sorted(model.config.id2label))
+            if _can_compile():
+                # Captures CUDA graphs per input shape; see warmup_model()
+                model = torch.compile(model, mode='reduce-overhead', fullgraph=False, dynamic=False)
             logger.info(f"Model loaded with labels: {model.config.id2label}")
             return model
         except Exception as e:
@@ -68,24 +227,110 @@ def load_model():
     logger.error("Model loading failed after retries")
     return None
 
-@lru_cache(maxsize=1)
 def load_tokenizer():
     """Load tokenizer with caching."""
-    try:
-        return AutoTokenizer.from_pretrained(config['model_name'])
-    except Exception as e:
-        logger.error(f"Tokenizer loading failed: {str(e)}")
-        return None
+    global _TOKENIZER
+    if _TOKENIZER is None:
+        try:
+            # Rust-backed tokenizer; the pure-Python one is 10-100x slower
+            _TOKENIZER = AutoTokenizer.from_pretrained(config['model_name'], use_fast=True)
+        except Exception as e:
+            logger.error(f"Tokenizer loading failed: {str(e)}")
+    return _TOKENIZER
+
+@lru_cache(maxsize=4096)
+def _tokenize(text: str) -> Dict[str, np.ndarray]:
+    """
+    Tokenize a single (already truncated) text, memoized on the text.
+    Returns read-only numpy arrays so cached entries can't be mutated.
+    """
+    kwargs = {**_TOKENIZE_KWARGS, 'return_tensors': 'np'}
+    if _can_compile():
+        # Keep single-text shapes on the compiled buckets too
+        kwargs.update(padding=True, pad_to_multiple_of=_SEQ_BUCKET)
+    encoded = _TOKENIZER(text, **kwargs)
+    arrays = {}
+    for key, value in encoded.items():
+        value.setflags(write=False)
+        arrays[key] = value
+    return arrays
 
 def validate_model():
-    """Check if model is ready; if not, clear cache and retry."""
-    global device
+    """
+    Check if model and tokenizer are ready. Once loaded this is two global
+    reads; a failed load is retried on the next call.
+    """
+    if _MODEL is not None and _TOKENIZER is not None:
+        return True
+    return load_tokenizer() is not None and load_model() is not None
+
+def reload_model():
+    """
+    Drop the cached model/tokenizer, re-pick the device and load again.
+    Device selection happens here and at import, never per request.
+    """
+    global _MODEL, _TOKENIZER, _WARMED, device
+    _MODEL = None
+    _TOKENIZER = None
+    _WARMED = False
+    _tokenize.cache_clear()
+    torch.cuda.empty_cache()
     device = get_device()
-    if load_tokenizer() is None or load_model() is None:
-        load_model.cache_clear()
-        load_tokenizer.cache_clear()
-        return load_tokenizer() is not None and load_model() is not None
-    return True
+    return validate_model()
+
+def warmup_model():
+    """
+    Load the model and run the shapes inference actually uses through it, so
+    that torch.compile / CUDA-graph capture happens before the first request:
+    batch 1 (analyze_sentiment) and a full batch (analyze_batch) at every
+    sequence bucket. Compiled graphs are keyed by shape and cudagraphs only
+    record after a warm call, hence several passes per shape; in eager mode
+    a single full-length pass is enough to page the weights in.
+    Runs at most once per process, however many startup hooks call it.
+    """
+    global _WARMED
+    if _WARMED:
+        return True
+    if not validate_model():
+        return False
+    if _can_compile():
+        seq_lens, passes = range(_SEQ_BUCKET, 512 + 1, _SEQ_BUCKET), 3
+    else:
+        seq_lens, passes = (512,), 1
+    pad_id = _TOKENIZER.pad_token_id or 0
+    try:
+        for batch in sorted({1, config['batch_size']}):
+            for seq_len in seq_lens:
+                input_ids = torch.full((batch, seq_len), pad_id, dtype=torch.long, device=device)
+                attention_mask = torch.ones_like(input_ids)
+                with torch.inference_mode():
+                    for _ in range(passes):
+                        _MODEL(input_ids=input_ids, attention_mask=attention_mask)
+        _WARMED = True
+        return True
+    except Exception as e:
+        logger.warning(f"Model warmup failed: {str(e)}")
+        return False
+
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+def _split_sentences(text: str) -> List[str]:
+    """Cheap regex sentence split, dropping fragments below min_text_length."""
+    return [
+        s for s in (part.strip() for part in _SENTENCE_SPLIT_RE.split(text))
+        if len(s) >= config['min_text_length']
+    ]
+
+def _pool_sentence_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Confidence-weighted vote: the label with the largest summed score wins,
+    reported with the mean score of the sentences that voted for it.
+    """
+    weights: Dict[str, List[float]] = {}
+    for r in results:
+        weights.setdefault(r['label'], []).append(r['score'])
+    label, scores = max(weights.items(), key=lambda kv: sum(kv[1]))
+    return {'label': label, 'score': float(sum(scores) / len(scores))}
 
 # ---- Main sentiment analysis functions ----
 def analyze_sentiment(text: str) -> Dict[str, Any]:
@@ -100,22 +345,30 @@ def analyze_sentiment(text: str) -> Dict[str, Any]:
     if len(text) < config['min_text_length']:
         return {'label': 'neutral', 'score': 0.0}
 
+    # Score multi-sentence documents sentence by sentence instead of running
+    # one long (and possibly 512-token truncated) sequence
+    text = text[:config['max_text_length']]
+    sentences = _split_sentences(text)
+    if len(sentences) > 1:
+        return _pool_sentence_results(analyze_batch(sentences))
+
+    mdl = _MODEL
+    if mdl is None:
+        # Unloaded by reload_model() since validate_model()
+        return {'label': 'neutral', 'score': 0.0}
     try:
-        inputs = load_tokenizer()(
-            text[:config['max_text_length']],
-            return_tensors="pt",
-            truncation=True,
-            max_length=512
-        ).to(device)
+        inputs = {
+            key: torch.tensor(value, device=device)
+            for key, value in _tokenize(text).items()
+        }
 
         with torch.inference_mode():
-            outputs = load_model()(**inputs)
-
-        probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-        score, idx = torch.max(probs, dim=-1)
+            outputs = mdl(**inputs)
+            probs = torch.nn.functional.softmax(outputs.logits.float(), dim=-1)
+            score, idx = torch.max(probs, dim=-1)
 
         return {
-            'label': load_model().config.id2label[idx.item()].lower(),
+            'label': mdl._id2label_lower[idx.item()],
             'score': float(score.item())
         }
     except torch.cuda.OutOfMemoryError:
@@ -129,33 +382,57 @@ def analyze_sentiment(text: str) -> Dict[str, Any]:
 def analyze_batch(texts: List[str]) -> List[Dict[str, Any]]:
     """
     Batch sentiment analysis with chunking to avoid OOM.
+    Texts shorter than min_text_length are scored neutral without inference,
+    multi-sentence texts are scored per sentence and pooled exactly as in
+    analyze_sentiment, and duplicate texts or sentences (same story from
+    several wires) are scored once.
     """
     if not validate_model() or not texts:
         return [{'label': 'neutral', 'score': 0.0} for _ in texts]
 
-    results = []
+    # Neutral placeholders up front; valid slots are overwritten in place
+    processed = [str(t).strip() for t in texts]
+    results = [{'label': 'neutral', 'score': 0.0} for _ in processed]
+    units_by_position: Dict[int, List[str]] = {}
+    for i, t in enumerate(processed):
+        if len(t) >= config['min_text_length']:
+            t = t[:config['max_text_length']]
+            sentences = _split_sentences(t)
+            units_by_position[i] = sentences if len(sentences) > 1 else [t]
+    # Length-sorted so each chunk pads to neighbours of similar length rather
+    # than to one long outlier; results are gathered back per position.
+    unique_texts = sorted(
+        dict.fromkeys(u for units in units_by_position.values() for u in units),
+        key=len
+    )
+    unit_results: Dict[str, Dict[str, Any]] = {}
+
+    mdl, tok = _MODEL, _TOKENIZER
+    if mdl is None or tok is None:
+        # Unloaded by reload_model() since validate_model()
+        return results
+    labels = mdl._id2label_lower
     batch_size = config['batch_size']
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i:i + batch_size]
+    for start in range(0, len(unique_texts), batch_size):
+        chunk = unique_texts[start:start + batch_size]
         try:
-            inputs = load_tokenizer()(
-                [str(t).strip()[:config['max_text_length']] for t in batch],
+            inputs = tok(
+                chunk,
                 padding=True,
-                truncation=True,
-                max_length=512,
-                return_tensors="pt"
+                pad_to_multiple_of=_SEQ_BUCKET,
+                **_TOKENIZE_KWARGS
             ).to(device)
 
             with torch.inference_mode():
-                outputs = load_model()(**inputs)
-
-            probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            scores, indices = torch.max(probs, dim=-1)
+                outputs = mdl(**inputs)
+                probs = torch.nn.functional.softmax(outputs.logits.float(), dim=-1)
+                scores, indices = torch.max(probs, dim=-1)
 
-            results.extend([{
-                'label': load_model().config.id2label[idx.item()].lower(),
-                'score': float(score.item())
-            } for score, idx in zip(scores, indices)])
+            # One device->host copy per tensor instead of one per row
+            score_list = scores.tolist()
+            idx_list = indices.tolist()
+            for text, score, idx in zip(chunk, score_list, idx_list):
+                unit_results[text] = {'label': labels[idx], 'score': float(score)}
 
             # Clean up memory
             del inputs, outputs, probs, scores, indices
@@ -166,7 +443,12 @@ def analyze_batch(texts: List[str]) -> List[Dict[str, Any]]:
             config['batch_size'] = max(1, batch_size // 2)
             return analyze_batch(texts)  # retry with smaller batch
         except Exception as e:
+            # Units in this chunk score neutral, as in analyze_sentiment
             logger.error(f"Batch processing failed: {str(e)}")
-            results.extend([{'label': 'neutral', 'score': 0.0} for _ in batch])
 
-    return results
\ No newline at end of file
+    neutral = {'label': 'neutral', 'score': 0.0}
+    for pos, units in units_by_position.items():
+        scored = [unit_results.get(u, neutral) for u in units]
+        results[pos] = _pool_sentence_results(scored) if len(scored) > 1 else dict(scored[0])
+
+    return results
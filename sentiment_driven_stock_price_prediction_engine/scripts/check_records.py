@@ -1,21 +1,36 @@
 import os
-import pandas as pd
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 
 # Correct absolute path to the CSV file
 file_path = r'C:\Users\HP\OneDrive\Desktop\Sentiment Driven Stock Price Prediction Using News Headlines\.venv\sentiment_driven_stock_price_prediction_engine\data\cleaned_data\ibm_cleaned.csv'
 
+# Parquet copy written by convert_csv_to_parquet.py, used for the tail
+parquet_path = os.path.splitext(file_path)[0] + '.parquet'
+
 # Check if the file exists
 if os.path.exists(file_path):
-    # Read the CSV file into a DataFrame
-    df = pd.read_csv(file_path)
+    # Stream the CSV and stop after the first record batch
+    reader = pacsv.open_csv(file_path)
+    first_batch = reader.read_next_batch()
 
     # Print the top row (first row)
     print("Top Row:")
-    print(df.head(1))
+    print(first_batch.slice(0, 1).to_pandas())
+
+    # Bottom row: last batch of the Parquet copy if present, else keep
+    # streaming the CSV and hold on to only the last batch
+    last_batch = first_batch
+    if os.path.exists(parquet_path):
+        for last_batch in pq.ParquetFile(parquet_path).iter_batches(batch_size=1024):
+            pass
+    else:
+        for last_batch in reader:
+            pass
 
     # Print the bottom row (last row)
     print("\nBottom Row:")
-    print(df.tail(1))
+    print(last_batch.slice(last_batch.num_rows - 1, 1).to_pandas())
 else:
     print(f"Error: The file '{file_path}' does not exist.")
 
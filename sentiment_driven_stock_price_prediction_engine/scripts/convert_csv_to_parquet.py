@@ -1,8 +1,10 @@
-import pandas as pd
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 
 csv_path = r'C:\Users\HP\OneDrive\Desktop\Sentiment Driven Stock Price Prediction Using News Headlines\.venv\sentiment_driven_stock_price_prediction_engine\data\cleaned_data\ibm_cleaned.csv'
-df_csv = pd.read_csv(csv_path)
+# Multithreaded Arrow reader; values never become Python objects
+table = pacsv.read_csv(csv_path, read_options=pacsv.ReadOptions(use_threads=True, block_size=64 << 20))
 
 # Specify the output path for the Parquet file
 parquet_path = r'C:\Users\HP\OneDrive\Desktop\Sentiment Driven Stock Price Prediction Using News Headlines\.venv\sentiment_driven_stock_price_prediction_engine\data\cleaned_data\ibm_cleaned.parquet'
-df_csv.to_parquet(parquet_path, index=False)
+pq.write_table(table, parquet_path, compression='zstd', use_dictionary=True, row_group_size=200_000)
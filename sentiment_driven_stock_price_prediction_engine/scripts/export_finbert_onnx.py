@@ -0,0 +1,52 @@
+"""
+Export the news FinBERT model to ONNX, run the ONNX Runtime transformer
+optimizer over it (Attention/LayerNorm/GELU fusion) and quantize the result
+to int8 (dynamic) for news/utils.py.
+
+Run once on the serving CPU family, then point FINBERT_ONNX_PATH at the
+int8 dir (the fused fp32 one is kept for accuracy checks and as a fallback):
+    python scripts/export_finbert_onnx.py ./models/finbert_onnx
+    -> ./models/finbert_onnx (fp32, fused), ./models/finbert_onnx_int8
+"""
+import sys
+
+from optimum.onnxruntime import ORTModelForSequenceClassification, ORTOptimizer, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig, OptimizationConfig
+
+# Must match FINBERT_CONFIG['model_name']; the tokenizer is loaded from there
+MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+output_dir = sys.argv[1] if len(sys.argv) > 1 else "./models/finbert_onnx"
+export_dir = f"{output_dir}_raw"
+int8_dir = f"{output_dir}_int8"
+
+
+def cpu_flags():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+
+model = ORTModelForSequenceClassification.from_pretrained(MODEL_NAME, export=True)
+model.save_pretrained(export_dir)
+
+optimizer = ORTOptimizer.from_pretrained(export_dir)
+optimizer.optimize(
+    save_dir=output_dir,
+    optimization_config=OptimizationConfig(optimization_level=99, optimize_for_gpu=False),
+)
+print(f"Optimized model written to {output_dir}")
+
+# VNNI does the int8 multiply-accumulate in one instruction; without it
+# int8 ORT can be slower than fp32, so target plain AVX2 there
+if "avx512_vnni" in cpu_flags():
+    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+else:
+    qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+quantizer = ORTQuantizer.from_pretrained(output_dir)
+quantizer.quantize(save_dir=int8_dir, quantization_config=qconfig)
+print(f"Quantized model written to {int8_dir}")
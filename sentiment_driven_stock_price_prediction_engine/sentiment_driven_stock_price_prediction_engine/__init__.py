@@ -1,2 +1,5 @@
 # No Celery – using synchronous tasks
-# This file is intentionally minimal to avoid unnecessary imports.
\ No newline at end of file
+# This file is intentionally minimal to avoid unnecessary imports.
+# celery_app.py is the only Celery app module; it is not imported here, so
+# Django startup never builds the app or runs autodiscover_tasks(). A worker
+# loads it explicitly: celery -A sentiment_driven_stock_price_prediction_engine.celery_app worker
@@ -0,0 +1,53 @@
+"""
+Redis cache compressor that leaves small values alone.
+
+Most cached values here (rate-limit flags, provider cooldowns, symbol search
+hits) are a few hundred bytes, where setting up a zlib stream costs more CPU
+than the bytes it saves. Only values of at least COMPRESS_MIN_LEN bytes are
+compressed: with lz4 when it is installed (several times faster than zlib at
+a similar ratio on JSON), zlib otherwise. Entries written by either codec, or
+left uncompressed, can always be read back.
+"""
+
+import zlib
+
+from django_redis.compressors.base import BaseCompressor
+from django_redis.exceptions import CompressorError
+
+try:
+    import lz4.frame as lz4_frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    lz4_frame = None
+    LZ4_AVAILABLE = False
+
+COMPRESS_MIN_LEN = 1024
+_LZ4_FRAME_MAGIC = b"\x04\x22\x4d\x18"
+
+
+class ThresholdCompressor(BaseCompressor):
+    """lz4/zlib compression for values of COMPRESS_MIN_LEN bytes and up."""
+
+    min_length = COMPRESS_MIN_LEN
+    zlib_preset = 6
+
+    def compress(self, value: bytes) -> bytes:
+        if len(value) < self.min_length:
+            return value
+        if LZ4_AVAILABLE:
+            return lz4_frame.compress(value)
+        return zlib.compress(value, self.zlib_preset)
+
+    def decompress(self, value: bytes) -> bytes:
+        # Raising CompressorError tells django_redis the value was stored raw
+        if value[:4] == _LZ4_FRAME_MAGIC:
+            if not LZ4_AVAILABLE:
+                raise CompressorError("lz4 payload but lz4 is not installed")
+            try:
+                return lz4_frame.decompress(value)
+            except Exception as e:
+                raise CompressorError(e)
+        try:
+            return zlib.decompress(value)
+        except zlib.error as e:
+            raise CompressorError(e)
@@ -1,6 +1,7 @@
 from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 
 os.environ.setdefault(
     "DJANGO_SETTINGS_MODULE",
@@ -14,11 +15,59 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
 
 # Worker safety defaults – adjusted for free tier
+_CONCURRENCY = int(os.environ.get("CELERY_WORKER_CONCURRENCY", os.cpu_count() or 1))
+
 app.conf.update(
+    worker_concurrency=_CONCURRENCY,
     worker_max_tasks_per_child=50,
     worker_max_memory_per_child=300000,  # ~300MB (safe for free tier)
     task_acks_late=True,
     task_reject_on_worker_lost=True,
+    task_acks_on_failure_or_timeout=True,
+    # FinBERT tasks are slow and memory-heavy: reserve one task at a time
+    worker_prefetch_multiplier=1,
     task_track_started=True,
-    broker_pool_limit=5,
-)
\ No newline at end of file
+    # One persistent broker connection per worker process
+    broker_pool_limit=max(2, _CONCURRENCY),
+    # Schedules are static, so keep beat on the file-backed scheduler rather
+    # than one that polls the database every tick
+    beat_scheduler="celery.beat:PersistentScheduler",
+)
+
+
+@worker_init.connect
+def preload_model(**kwargs):
+    # Runs in the parent before the pool forks: children inherit the loaded
+    # weights and share those pages copy-on-write instead of each loading
+    # their own copy
+    if os.environ.get("FINBERT_PRELOAD") == "1":
+        import django
+        django.setup()
+        from news.utils import validate_model
+        validate_model()
+
+
+@worker_process_init.connect
+def limit_torch_threads(**kwargs):
+    # Scale with worker_concurrency, not intra-op threads: N processes each
+    # running one OpenMP thread per core would oversubscribe the CPU N-fold
+    threads = os.environ.get("FINBERT_INTRA_THREADS", "1")
+    os.environ["OMP_NUM_THREADS"] = threads
+    os.environ["MKL_NUM_THREADS"] = threads
+    import torch
+    torch.set_num_threads(int(threads))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # already fixed (news.utils sets it to 1 at import)
+
+
+@worker_process_init.connect
+def warmup_model_on_startup(**kwargs):
+    # Fires once in each forked child (unlike on_after_configure, which
+    # fires per config load); warmup_model() itself is also once-only.
+    # With FINBERT_PRELOAD the model is already there and this only runs
+    # the forward passes
+    if os.environ.get("FINBERT_WARMUP") == "1":
+        from news.utils import warmup_model
+        warmup_model()
@@ -17,7 +17,9 @@ import sys
 import logging
 import json
 import time
-from logging.handlers import RotatingFileHandler
+import atexit
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from typing import Optional, Dict, Any, Union
 from functools import wraps
 
@@ -263,6 +265,71 @@ class LogSamplingFilter(logging.Filter):
         return True
 
 
+# ============================================================================
+# QUEUED HANDLERS
+# ============================================================================
+
+class _QueuedHandler(QueueHandler):
+    """
+    Format on the calling thread, write on a background thread.
+    
+    The record is formatted by this handler (so dictConfig formatters and
+    filters apply as usual) and pushed onto an in-process queue; a
+    QueueListener drains it to the real handler, so request/task threads
+    never block on stream or file I/O. One listener per process: it is
+    started by the first emit() in each PID, because a prefork child
+    inherits this handler from the parent but not its listener thread.
+    """
+    
+    def __init__(self, target: logging.Handler):
+        super().__init__(queue.SimpleQueue())
+        # Records arrive pre-formatted; write the message as-is
+        target.setFormatter(logging.Formatter('%(message)s'))
+        self.target = target
+        self.listener = None
+        self._listener_pid = None
+        atexit.register(self._stop_listener)
+    
+    def _start_listener(self):
+        # Fresh queue too: anything the parent left queued was never ours
+        self.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=False)
+        self.listener.start()
+        self._listener_pid = os.getpid()
+    
+    def emit(self, record):
+        # Handler.handle() holds self.lock here, so only one thread starts it
+        if self._listener_pid != os.getpid():
+            self._start_listener()
+        super().emit(record)
+    
+    def _stop_listener(self):
+        # Drains whatever is still queued; safe to call more than once
+        if self._listener_pid == os.getpid() and self.listener._thread is not None:
+            self.listener.stop()
+    
+    def close(self):
+        self._stop_listener()
+        self.target.close()
+        super().close()
+
+
+class QueuedStreamHandler(_QueuedHandler):
+    """StreamHandler whose writes happen off the logging thread."""
+    
+    def __init__(self, stream=None):
+        super().__init__(logging.StreamHandler(stream))
+
+
+class QueuedRotatingFileHandler(_QueuedHandler):
+    """RotatingFileHandler whose writes happen off the logging thread."""
+    
+    def __init__(self, filename, maxBytes: int = 0, backupCount: int = 0, encoding: Optional[str] = None):
+        super().__init__(
+            RotatingFileHandler(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding, delay=True)
+        )
+
+
 # ============================================================================
 # CONTEXT-AWARE LOGGER
 # ============================================================================
@@ -8,7 +8,7 @@ import logging
 from dotenv import load_dotenv
 import dj_database_url
 from django.core.exceptions import ImproperlyConfigured
-from .logging_config import CustomJsonFormatter
+from .logging_config import CustomJsonFormatter, QueuedRotatingFileHandler, QueuedStreamHandler
 
 # Load environment variables first
 load_dotenv()
@@ -32,8 +32,10 @@ if not SECRET_KEY:
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 
 # --- Database Connection Settings ---
-# Prevent connection issues on Render free tier
-CONN_MAX_AGE = 0  # Close connections after each request
+# Prevent connection issues on Render free tier: close connections after
+# each request. Persistent connections are opt-in via DB_CONN_MAX_AGE
+# (seconds); each worker thread then holds its own connection.
+CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", 0))
 CONN_HEALTH_CHECKS = True  # Check connection health before using
 
 # ALLOWED_HOSTS - combine environment variable with required defaults
@@ -149,7 +151,8 @@ if database_url:
             'PASSWORD': parsed.password,
             'HOST': parsed.hostname,
             'PORT': parsed.port or 5432,
-            'CONN_MAX_AGE': 0,  # Close connections after each request
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': CONN_HEALTH_CHECKS,
             'OPTIONS': {
                 'sslmode': 'require',
                 'connect_timeout': 10,
@@ -221,6 +224,10 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'sentiment_driven_stock_price_prediction_engine.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 # JWT settings
@@ -345,6 +352,13 @@ SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
 
 # --- Caching Configuration (Redis with Fallback) ---
 REDIS_URL = os.getenv('REDIS_URL')
+# When Redis runs on the same host, talk to it over its Unix socket
+# (redis.conf: unixsocket /var/run/redis/redis.sock) and skip TCP entirely
+REDIS_SOCKET_PATH = os.getenv('REDIS_SOCKET_PATH')
+if REDIS_SOCKET_PATH:
+    REDIS_URL = f"unix://{REDIS_SOCKET_PATH}?db=0"
+# One pool per process; enough for the request threads plus the news fetch pool
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 16))
 
 if REDIS_URL:
     CACHES = {
@@ -355,14 +369,18 @@ if REDIS_URL:
                 'CLIENT_CLASS': 'django_redis.client.DefaultClient',
                 'SOCKET_CONNECT_TIMEOUT': 10,
                 'SOCKET_TIMEOUT': 5,
-                'COMPRESSOR': 'django_redis.compressors.zlib.ZlibCompressor',
+                # lz4/zlib, and only for values >= 1 KB (see cache_compressors)
+                'COMPRESSOR': 'sentiment_driven_stock_price_prediction_engine.cache_compressors.ThresholdCompressor',
                 'IGNORE_EXCEPTIONS': True,  # Fail silently if Redis is down
+                'CONNECTION_POOL_KWARGS': {'max_connections': REDIS_MAX_CONNECTIONS},
                 'MAX_ENTRIES': 1000,
                 'CULL_FREQUENCY': 3,
             },
             'KEY_PREFIX': 'sentiment_analysis',
         }
     }
+    # Only read by celery_app.py; the web process never talks to a broker
+    CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', REDIS_URL)
 else:
     # Fallback to local memory cache
     CACHES = {
@@ -391,13 +409,17 @@ LOGGING = {
         },
     },
     'handlers': {
+        # Formatting happens on the calling thread; the write itself is
+        # handed to a per-process listener thread (see logging_config)
         'console': {
-            'class': 'logging.StreamHandler',
+            '()': QueuedStreamHandler,
             'formatter': 'json' if USE_JSON_LOGS else 'verbose',
         },
         'file': {
-            'class': 'logging.FileHandler',
+            '()': QueuedRotatingFileHandler,
             'filename': LOG_DIR / 'app.log',
+            'maxBytes': 50 * 1024 * 1024,  # 50 MB
+            'backupCount': 3,
             'formatter': 'json' if USE_JSON_LOGS else 'verbose',
         },
     },
@@ -436,6 +458,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'celery': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
 
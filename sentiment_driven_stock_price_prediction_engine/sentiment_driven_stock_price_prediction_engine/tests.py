@@ -0,0 +1,57 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from django_redis.compressors.zlib import ZlibCompressor
+from django_redis.exceptions import CompressorError
+from rest_framework.renderers import JSONRenderer
+
+from .cache_compressors import COMPRESS_MIN_LEN, ThresholdCompressor
+from .renderers import ORJSONRenderer
+
+
+class ThresholdCompressorTests(SimpleTestCase):
+    def setUp(self):
+        self.compressor = ThresholdCompressor(options={})
+
+    def test_small_values_stored_raw(self):
+        value = b'{"cooldown": true}'
+        self.assertEqual(self.compressor.compress(value), value)
+
+    def test_large_values_round_trip(self):
+        value = b'{"headline": "Shares rallied"}' * COMPRESS_MIN_LEN
+        compressed = self.compressor.compress(value)
+        self.assertLess(len(compressed), len(value))
+        self.assertEqual(self.compressor.decompress(compressed), value)
+
+    def test_reads_entries_written_by_zlib_compressor(self):
+        value = b'{"symbol": "AAPL"}' * COMPRESS_MIN_LEN
+        legacy = ZlibCompressor(options={}).compress(value)
+        self.assertEqual(self.compressor.decompress(legacy), value)
+
+    def test_raw_value_raises_compressor_error(self):
+        # django_redis falls back to the stored bytes on CompressorError
+        with self.assertRaises(CompressorError):
+            self.compressor.decompress(b'{"cooldown": true}')
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def assertRendersLikeDrf(self, data):
+        self.assertEqual(
+            json.loads(ORJSONRenderer().render(data)),
+            json.loads(JSONRenderer().render(data)),
+        )
+
+    def test_plain_payloads(self):
+        self.assertRendersLikeDrf({'symbol': 'AAPL', 'scores': [0.1, -0.5, 1], 'meta': None})
+        self.assertRendersLikeDrf([{'label': 'positive'}, {'label': 'neutral', 'ok': True}])
+
+    def test_aware_utc_datetime(self):
+        self.assertRendersLikeDrf({'published_at': datetime(2024, 5, 1, 13, 30, tzinfo=timezone.utc)})
+
+    def test_decimal_uses_drf_encoding(self):
+        self.assertRendersLikeDrf({'price': Decimal('187.25')})
+
+    def test_none_renders_empty_body(self):
+        self.assertEqual(ORJSONRenderer().render(None), b'')
@@ -12,7 +12,6 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 from functools import lru_cache
-from celery import shared_task
 from django.db import transaction
 from .models import StockOpinion
 
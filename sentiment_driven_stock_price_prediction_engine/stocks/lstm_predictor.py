@@ -17,19 +17,25 @@ Usage:
 """
 
 import os
+import time
 import logging
+from functools import lru_cache
 import torch
 import torch.nn as nn
 import numpy as np
 import yfinance as yf
 from datetime import datetime, timedelta
 from django.conf import settings
+from django.db.models import Avg, Count
 
 # Import FinBERT sentiment (must be available in news.utils)
 from news.utils import analyze_sentiment
 
 logger = logging.getLogger(__name__)
 
+# Features come from daily bars; reuse them for this long per symbol
+FEATURE_CACHE_SECONDS = 900
+
 # ============================================================================
 # 1. LSTM Model Architecture (must match training script)
 # ============================================================================
@@ -106,6 +112,27 @@ def compute_lstm_features(symbol: str) -> dict:
         logger.error(f"Error computing LSTM features for {symbol}: {e}")
         return None
 
+
+@lru_cache(maxsize=128)
+def _lstm_features_for_bucket(symbol: str, bucket: int) -> dict:
+    features = compute_lstm_features(symbol)
+    if features is None:
+        # Raising keeps failures out of the lru_cache so the next call retries
+        raise LookupError(symbol)
+    return features
+
+
+def get_lstm_features(symbol: str) -> dict:
+    """
+    compute_lstm_features memoized per symbol for FEATURE_CACHE_SECONDS, so
+    repeat predictions skip the 2-year download. Returns None on failure.
+    The returned dict is shared; treat it as read-only.
+    """
+    try:
+        return _lstm_features_for_bucket(symbol.upper(), int(time.time() // FEATURE_CACHE_SECONDS))
+    except LookupError:
+        return None
+
 # ============================================================================
 # 3. Sentiment Fallback
 # ============================================================================
@@ -142,8 +169,15 @@ def get_sentiment_fallback(symbol: str, news_text: str = "") -> dict:
             # Query recent news from the database (last 7 days)
             from news.models import ProcessedNews
             cutoff = datetime.now() - timedelta(days=7)
-            news = ProcessedNews.objects.filter(symbol=symbol.upper(), published_at__gte=cutoff)
-            if not news.exists():
+            # One aggregate query: article count, scored count and mean
+            stats = ProcessedNews.objects.filter(
+                symbol=symbol.upper(), published_at__gte=cutoff
+            ).aggregate(
+                articles=Count('id'),
+                scored=Count('sentiment_score'),
+                avg_sentiment=Avg('sentiment_score'),
+            )
+            if not stats['articles']:
                 return {
                     'prediction': 'HOLD',
                     'confidence': 0.0,
@@ -152,8 +186,7 @@ def get_sentiment_fallback(symbol: str, news_text: str = "") -> dict:
                     'fallback': True,
                     'message': 'No recent news found'
                 }
-            scores = [n.sentiment_score for n in news if n.sentiment_score is not None]
-            if not scores:
+            if not stats['scored']:
                 return {
                     'prediction': 'HOLD',
                     'confidence': 0.0,
@@ -162,8 +195,7 @@ def get_sentiment_fallback(symbol: str, news_text: str = "") -> dict:
                     'fallback': True,
                     'message': 'No sentiment scores available'
                 }
-            avg_sentiment = sum(scores) / len(scores)
-            sentiment_score = avg_sentiment
+            sentiment_score = stats['avg_sentiment']
 
         # Map sentiment to direction and confidence
         if sentiment_score > 0.2:
@@ -269,7 +301,7 @@ class LSTMPredictor:
         # --------------------------------------------------------------------
         # 2. Compute technical features
         # --------------------------------------------------------------------
-        tech_features = compute_lstm_features(symbol)
+        tech_features = get_lstm_features(symbol)
         if tech_features is None:
             result = get_sentiment_fallback(symbol, news_text)
             result['error'] = 'Insufficient price data'
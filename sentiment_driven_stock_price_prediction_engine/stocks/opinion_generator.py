@@ -16,13 +16,16 @@ Author: Anyega Alex Kamau
 Version: 5.3
 """
 
-import gc
-import re
 import logging
 import datetime
 import time
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from django.conf import settings
+from django.db import close_old_connections
 from typing import List, Dict, Any, Optional, Tuple, Union
 from enum import Enum
 from dataclasses import dataclass
@@ -31,7 +34,8 @@ import numpy as np
 import pandas as pd
 import yfinance as yf
 import requests
-from pydantic import BaseModel, Field, field_validator
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Suppress warnings for production
 import warnings
@@ -50,10 +54,12 @@ from .cache_utils import (
     cache_technical_data,
     get_cached_data,
     set_cached_data,
+    get_cache_key,
     TTL_PRICE,
     TTL_TECHNICAL,
     TTL_MARKET_REGIME,
 )
+from sentiment_driven_stock_price_prediction_engine.renderers import loads_json
 
 # Configure module logger
 logger = logging.getLogger(__name__)
@@ -73,6 +79,10 @@ class Config:
     REQUEST_TIMEOUT = 15
     MAX_RETRIES = 3
     RETRY_DELAY = 1.0
+    YF_CACHE_SECONDS = 900  # 15-minute buckets for shared yfinance downloads
+    YF_TIMEOUT = 5  # per-request socket timeout for yfinance downloads
+    SPY_REGIME_BARS = 252  # one year of trading days
+    METRICS_CACHE_SIZE = 64  # (symbol, last bar) entries kept by TechnicalAnalyzer
     
     # Rate limiting
     RATE_LIMIT_PER_MINUTE = 200
@@ -147,29 +157,34 @@ class MarketRegimeResult:
         }
 
 
-class TechnicalMetrics(BaseModel):
+# Frozen: instances are shared through the per-bar memo and Redis cache
+@dataclass(slots=True, frozen=True)
+class TechnicalMetrics:
     """Technical analysis metrics with validation."""
     sma_50: float
     sma_200: float
-    rsi: float = Field(..., ge=0, le=100)
-    current_price: float = Field(..., gt=0)
-    volatility: float = Field(..., ge=0)
-    confidence: float = Field(..., ge=0, le=100)
-    volume: Optional[float] = None
-    support: Optional[float] = None         
-    resistance: Optional[float] = None      
-    pivot: Optional[float] = None            
-    price_history: Optional[List[float]] = None  
+    rsi: float
+    current_price: float
+    volatility: float
+    confidence: float
     market_regime: MarketRegimeResult
+    volume: Optional[float] = None
+    support: Optional[float] = None
+    resistance: Optional[float] = None
+    pivot: Optional[float] = None
+    price_history: Optional[List[float]] = None
     
-    class Config:
-        arbitrary_types_allowed = True
-    
-    @field_validator('rsi')
-    def validate_rsi(cls, v):
-        if v < 0 or v > 100:
+    def __post_init__(self):
+        # Same bounds the old pydantic Field constraints enforced; written
+        # as negated ranges so NaN is rejected too
+        if not 0 <= self.rsi <= 100:
             raise ValueError('RSI must be between 0 and 100')
-        return v
+        if not self.current_price > 0:
+            raise ValueError('current_price must be positive')
+        if not self.volatility >= 0:
+            raise ValueError('volatility must be non-negative')
+        if not 0 <= self.confidence <= 100:
+            raise ValueError('confidence must be between 0 and 100')
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -183,6 +198,126 @@ class TechnicalMetrics(BaseModel):
         }
 
 
+# ============================================================================
+# Shared yfinance download cache
+# ============================================================================
+
+# (symbol, period) -> (time bucket, frame). Process-wide, so every analyzer
+# and detector instance reuses one download per 15-minute bucket.
+_yf_cache: Dict[Tuple[str, str], Tuple[int, pd.DataFrame]] = {}
+_yf_cache_lock = threading.Lock()
+
+# Long-lived pool for independent upstream GETs issued side by side
+_FETCH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="price-fetch")
+# Separate pool for the LSTM prediction, which runs ORM queries; kept apart
+# so it never waits on _FETCH_EXECUTOR, which the technical fetch submits to
+_LSTM_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lstm")
+
+
+def _with_db_cleanup(func, *args):
+    """
+    Run func on a pool thread with the request-cycle connection handling
+    Django applies to its own threads, so pooled threads don't keep stale
+    or over-age connections open between tasks.
+    """
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+@lru_cache(maxsize=16)
+def _wilder_weights(n: int, alpha: float) -> np.ndarray:
+    """
+    Decay weights of an n-point adjust=False EMA, oldest first. History
+    lengths repeat (the same period is fetched for every symbol), so the
+    powers are computed once per (n, alpha) and shared read-only.
+    """
+    weights = (1.0 - alpha) ** np.arange(n - 1, -1, -1, dtype=np.float64)
+    weights[1:] *= alpha
+    weights.flags.writeable = False
+    return weights
+
+
+def _is_valid_symbol(symbol: str) -> bool:
+    """1-5 ASCII uppercase letters; same set as ^[A-Z]{1,5}$ without regex."""
+    return 1 <= len(symbol) <= 5 and symbol.isascii() and symbol.isalpha() and symbol.isupper()
+
+
+@lru_cache(maxsize=1)
+def _shared_session() -> requests.Session:
+    """One pooled keep-alive session for every upstream price API call."""
+    session = requests.Session()
+    retry = Retry(
+        total=Config.MAX_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=[500, 502, 503, 504],
+    )
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+def _cached_download(symbol: str, period: str) -> pd.DataFrame:
+    """Single-symbol form of _cached_download_many."""
+    return _cached_download_many([symbol], period)[symbol]
+
+
+def _cached_download_many(symbols: List[str], period: str) -> Dict[str, pd.DataFrame]:
+    """
+    yf.download with a time-bucketed cache: in-process first, then Redis,
+    so other workers and restarted processes reuse the same download.
+    Symbols missing from both are fetched together in one multi-ticker
+    request and cached individually. Empty results are not cached, so
+    callers' retry loops still reach the network. Callers must treat the
+    returned frames as read-only.
+    """
+    bucket = int(time.time() // Config.YF_CACHE_SECONDS)
+    frames: Dict[str, pd.DataFrame] = {}
+    missing = []
+    for symbol in dict.fromkeys(symbols):
+        with _yf_cache_lock:
+            hit = _yf_cache.get((symbol, period))
+        if hit is not None and hit[0] == bucket:
+            frames[symbol] = hit[1]
+            continue
+        data = get_cached_data(get_cache_key("yf", symbol, period, bucket))
+        if data is not None:
+            frames[symbol] = data
+        else:
+            missing.append(symbol)
+
+    if missing:
+        data = yf.download(
+            missing,
+            period=period,
+            group_by='ticker',
+            progress=False,
+            auto_adjust=True,
+            threads=len(missing) > 1,
+            timeout=Config.YF_TIMEOUT,
+        )
+        fetched = set(data.columns.get_level_values(0)) if not data.empty else set()
+        for symbol in missing:
+            frame = data[symbol].dropna(how='all') if symbol in fetched else pd.DataFrame()
+            if not frame.empty:
+                set_cached_data(
+                    get_cache_key("yf", symbol, period, bucket), frame, Config.YF_CACHE_SECONDS
+                )
+            frames[symbol] = frame
+
+    with _yf_cache_lock:
+        for stale in [k for k, (b, _) in _yf_cache.items() if b != bucket]:
+            del _yf_cache[stale]
+        for symbol, frame in frames.items():
+            if not frame.empty:
+                _yf_cache[(symbol, period)] = (bucket, frame)
+    return frames
+
+
 # ============================================================================
 # Market Regime Detector
 # ============================================================================
@@ -196,11 +331,12 @@ class MarketRegimeDetector:
     """
     
     def __init__(self):
-        self._spy_cache = None
-        self._spy_cache_timestamp = None
-        self._cache_duration = datetime.timedelta(minutes=15)
         self._initialized = False  # ✅ Track initialization
     
+    def _ensure_initialized(self):
+        """Nothing heavy to build; SPY data comes from the shared download cache."""
+        self._initialized = True
+    
     def get_current_regime(self, force_refresh: bool = False) -> MarketRegimeResult:
         """Get current market regime with Redis caching."""
         self._ensure_initialized()  # ✅ Lazy init
@@ -216,19 +352,23 @@ class MarketRegimeDetector:
             return self._get_neutral_regime()
         
         try:
-            closes = spy_data['Close']
-            sma_50 = closes.rolling(50).mean().iloc[-1]
-            sma_200 = closes.rolling(200).mean().iloc[-1]
-            current_price = closes.iloc[-1]
-            returns = closes.pct_change().dropna()
-            volatility = returns.std() * np.sqrt(252)
+            # Scalars straight off the close array; a window longer than the
+            # history gives NaN, whose comparisons count as a missing signal
+            # Last year of the shared 2y SPY download
+            closes = spy_data['Close'].to_numpy(dtype=np.float64).ravel()[-Config.SPY_REGIME_BARS:]
+            sma_50 = closes[-50:].mean() if len(closes) >= 50 else np.nan
+            sma_200 = closes[-200:].mean() if len(closes) >= 200 else np.nan
+            current_price = closes[-1]
+            returns = np.diff(closes) / closes[:-1]
+            returns = returns[~np.isnan(returns)]
+            volatility = returns.std(ddof=1) * np.sqrt(252)
             
             bull_signals = [
                 current_price > sma_50,
                 current_price > sma_200,
                 sma_50 > sma_200,
                 volatility < 0.25,
-                returns.tail(20).mean() > 0
+                returns[-20:].mean() > 0
             ]
             bull_factor = sum(bull_signals) / len(bull_signals)
             confidence = min(100, max(0, int(100 * bull_factor)))
@@ -249,25 +389,11 @@ class MarketRegimeDetector:
             return self._get_neutral_regime()
     
     def _fetch_spy_data(self) -> pd.DataFrame:
-        """Fetch SPY data with caching."""
-        now = datetime.datetime.now()
-        if (self._spy_cache is not None and 
-            self._spy_cache_timestamp is not None and
-            now - self._spy_cache_timestamp < datetime.timedelta(minutes=15)):
-            return self._spy_cache
-        
+        """Fetch SPY data via the shared 15-minute download cache."""
         for attempt in range(Config.MAX_RETRIES):
             try:
-                spy_data = yf.download(
-                    "SPY",
-                    period="1y",
-                    progress=False,
-                    auto_adjust=True,
-                    timeout=Config.REQUEST_TIMEOUT
-                )
+                spy_data = _cached_download("SPY", "2y")
                 if not spy_data.empty:
-                    self._spy_cache = spy_data
-                    self._spy_cache_timestamp = now
                     return spy_data
             except Exception as e:
                 logger.warning(f"SPY download attempt {attempt + 1} failed: {e}")
@@ -307,6 +433,11 @@ class TechnicalAnalyzer:
         self.twelvedata_key = os.getenv('TWELVEDATA_API_KEY', '')
         self.alpha_vantage_key = os.getenv('ALPHA_VANTAGE_KEY', '')
         
+        # (symbol, last bar timestamp) -> metrics; a refetch that brings no
+        # new bar reuses the previous computation
+        self._metrics_cache: "OrderedDict[Tuple[str, Any], TechnicalMetrics]" = OrderedDict()
+        self._metrics_cache_lock = threading.Lock()
+        
         def _ensure_initialized(self):
             """Lazy initialize – only create heavy objects when needed."""
             if self._initialized:
@@ -335,14 +466,9 @@ class TechnicalAnalyzer:
             return pd.DataFrame()
         
         try:
-            # Get quote (to verify symbol exists)
+            # Quote (to verify symbol exists) and candles are independent
+            # GETs: issue both at once rather than one round-trip after the other
             quote_url = f"https://finnhub.io/api/v1/quote?symbol={symbol}&token={self.finnhub_key}"
-            quote_resp = requests.get(quote_url, timeout=5)
-            quote_data = quote_resp.json()
-            
-            if 'c' not in quote_data or quote_data['c'] <= 0:
-                logger.debug(f"Finnhub: No valid quote for {symbol}")
-                return pd.DataFrame()
             
             # Get historical candles (up to 300 days)
             now = datetime.datetime.now()
@@ -357,8 +483,16 @@ class TechnicalAnalyzer:
                 f"&to={end}"
                 f"&token={self.finnhub_key}"
             )
-            candle_resp = requests.get(candle_url, timeout=10)
-            candle_data = candle_resp.json()
+            session = _shared_session()
+            quote_future = _FETCH_EXECUTOR.submit(session.get, quote_url, timeout=5)
+            candle_future = _FETCH_EXECUTOR.submit(session.get, candle_url, timeout=10)
+            quote_data = quote_future.result().json()
+            
+            if 'c' not in quote_data or quote_data['c'] <= 0:
+                logger.debug(f"Finnhub: No valid quote for {symbol}")
+                return pd.DataFrame()
+            
+            candle_data = candle_future.result().json()
             
             if 'c' not in candle_data or len(candle_data['c']) < 20:
                 logger.debug(f"Finnhub: Insufficient candle data for {symbol}")
@@ -397,28 +531,32 @@ class TechnicalAnalyzer:
                 'outputsize': 200,
                 'apikey': self.twelvedata_key,
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = _shared_session().get(url, params=params, timeout=10)
             data = response.json()
 
             if 'values' not in data or not data['values']:
                 logger.debug(f"Twelve Data: No data for {symbol}")
                 return pd.DataFrame()
 
-            # Build DataFrame
-            df = pd.DataFrame(data['values'])
-            df['datetime'] = pd.to_datetime(df['datetime'])
-            df.set_index('datetime', inplace=True)
-
-
-            df.rename(columns={
+            # Build typed float64 columns straight from the JSON rows instead
+            # of an object-dtype frame of strings that is then re-cast
+            values = data['values']
+            fields = {
                 'open': 'Open',
                 'high': 'High',
                 'low': 'Low',
                 'close': 'Close',
                 'volume': 'Volume'
-            }, inplace=True)
-
-            df = df.astype(float)
+            }
+            df = pd.DataFrame(
+                {
+                    column: np.fromiter(
+                        (float(row[key]) for row in values), dtype=np.float64, count=len(values)
+                    )
+                    for key, column in fields.items() if key in values[0]
+                },
+                index=pd.DatetimeIndex([row['datetime'] for row in values], name='datetime'),
+            )
             df = df.sort_index()
 
             logger.info(f"Fetched {len(df)} days for {symbol} from Twelve Data")
@@ -437,14 +575,12 @@ class TechnicalAnalyzer:
             for attempt in range(Config.MAX_RETRIES):
                 try:
                     logger.info(f"Fetching {period} data for {symbol} from Yahoo (attempt {attempt + 1})")
-                    data = yf.download(
-                        symbol,
-                        period=period,
-                        progress=False,
-                        auto_adjust=True,
-                        threads=False,
-                        timeout=Config.REQUEST_TIMEOUT
-                    )
+                    if period == '2y':
+                        # SPY rides along so the regime detector that runs
+                        # next finds it in the download cache
+                        data = _cached_download_many([symbol, "SPY"], period)[symbol]
+                    else:
+                        data = _cached_download(symbol, period)
                     
                     if not data.empty and len(data) >= self._min_data_points:
                         logger.info(f"Successfully fetched {len(data)} days for {symbol}")
@@ -473,7 +609,7 @@ class TechnicalAnalyzer:
             return pd.DataFrame()
         
         try:
-            response = requests.get(
+            response = _shared_session().get(
                 'https://www.alphavantage.co/query',
                 params={
                     'function': 'TIME_SERIES_DAILY',
@@ -484,15 +620,30 @@ class TechnicalAnalyzer:
                 timeout=Config.REQUEST_TIMEOUT
             )
             response.raise_for_status()
-            data = response.json()
+            data = loads_json(response.content)
             
             if 'Time Series (Daily)' in data:
                 ts = data['Time Series (Daily)']
-                df = pd.DataFrame.from_dict(ts, orient='index')
-                df.index = pd.to_datetime(df.index)
+                # Parse every date key in one NumPy datetime64 call and fill
+                # float columns directly, not via an object frame of strings
+                dates = list(ts)
+                bars = [ts[d] for d in dates]
+                df = pd.DataFrame(
+                    {
+                        column: np.fromiter(
+                            (float(bar[key]) for bar in bars), dtype=np.float64, count=len(bars)
+                        )
+                        for key, column in (
+                            ('1. open', 'Open'),
+                            ('2. high', 'High'),
+                            ('3. low', 'Low'),
+                            ('4. close', 'Close'),
+                            ('5. volume', 'Volume'),
+                        )
+                    },
+                    index=pd.DatetimeIndex(np.asarray(dates, dtype='datetime64[D]')),
+                )
                 df = df.sort_index()
-                df['Close'] = df['4. close'].astype(float)
-                df['Volume'] = df['5. volume'].astype(float)
                 logger.info(f"Fetched {len(df)} days for {symbol} from Alpha Vantage")
                 return df
                 
@@ -575,21 +726,37 @@ class TechnicalAnalyzer:
                 cache_technical_data(symbol, metrics, TTL_TECHNICAL)
                 return metrics
             
-            # 3. Calculate metrics
-            closes = data['Close']
-            sma_200 = closes.rolling(min(200, len(closes))).mean().iloc[-1]
-            sma_50 = closes.rolling(50).mean().iloc[-1]
-            current_price = closes.iloc[-1]
-            returns = closes.pct_change().dropna()
-            recent_returns = returns.tail(60)
-            volatility = recent_returns.std() * np.sqrt(252)
-            rsi = self._calculate_rsi(closes)
+            bar_key = (symbol, data.index[-1])
+            with self._metrics_cache_lock:
+                metrics = self._metrics_cache.get(bar_key)
+                if metrics is not None:
+                    self._metrics_cache.move_to_end(bar_key)
+            if metrics is not None:
+                cache_technical_data(symbol, metrics, TTL_TECHNICAL)
+                return metrics
+            
+            # 3. Calculate metrics. Only the latest value of each indicator is
+            # used, so read them off one float64 array: tail means instead of
+            # full-length rolling Series, returns via np.diff
+            close = data['Close'].to_numpy(dtype=np.float64).ravel()
+            sma_200 = close[-min(200, len(close)):].mean()
+            sma_50 = close[-50:].mean()
+            current_price = close[-1]
+            returns = np.diff(close) / close[:-1]
+            returns = returns[~np.isnan(returns)]
+            volatility = returns[-60:].std(ddof=1) * np.sqrt(252)
+            rsi = self._calculate_rsi(close)
             regime = self.regime_detector.get_current_regime()
+            # Volume column read once; shared by the confidence score and the metrics
+            volumes = (
+                data['Volume'].to_numpy(dtype=np.float64).ravel()
+                if 'Volume' in data.columns else None
+            )
             confidence = self._calculate_confidence(
-                data, sma_50, sma_200, current_price, rsi, volatility
+                volumes, sma_50, sma_200, current_price, rsi, volatility
             )
 
-            volume = float(data['Volume'].iloc[-1]) if 'Volume' in data.columns else None
+            volume = float(volumes[-1]) if volumes is not None else None
             
             # Ensure price is valid
             if current_price <= 0:
@@ -607,8 +774,13 @@ class TechnicalAnalyzer:
                 market_regime=regime
             )
             
-            # 4. Store in Redis cache
+            # 4. Store in Redis cache and the per-bar memo
             cache_technical_data(symbol, metrics, TTL_TECHNICAL)
+            with self._metrics_cache_lock:
+                self._metrics_cache[bar_key] = metrics
+                self._metrics_cache.move_to_end(bar_key)
+                while len(self._metrics_cache) > Config.METRICS_CACHE_SIZE:
+                    self._metrics_cache.popitem(last=False)
             
             return metrics
             
@@ -618,14 +790,21 @@ class TechnicalAnalyzer:
             cache_technical_data(symbol, metrics, TTL_TECHNICAL)
             return metrics
     
-    def _calculate_rsi(self, closes: pd.Series, window: int = 14) -> float:
+    @staticmethod
+    def _wilder_last(values: np.ndarray, alpha: float) -> float:
+        """Last value of ewm(alpha, adjust=False).mean(), as one dot product."""
+        return float(_wilder_weights(len(values), alpha) @ values)
+
+    def _calculate_rsi(self, close: np.ndarray, window: int = 14) -> float:
         """Calculate RSI indicator."""
         try:
-            delta = closes.diff()
-            gain = delta.clip(lower=0)
-            loss = -delta.clip(upper=0)
-            avg_gain = gain.ewm(alpha=1/window, adjust=False).mean().iloc[-1]
-            avg_loss = loss.ewm(alpha=1/window, adjust=False).mean().iloc[-1]
+            delta = np.diff(close)
+            delta = delta[~np.isnan(delta)]
+            if delta.size == 0:
+                return 50.0
+            alpha = 1 / window
+            avg_gain = self._wilder_last(np.maximum(delta, 0.0), alpha)
+            avg_loss = self._wilder_last(np.maximum(-delta, 0.0), alpha)
             if avg_loss == 0:
                 return 100.0
             rs = avg_gain / avg_loss
@@ -636,7 +815,7 @@ class TechnicalAnalyzer:
     
     def _calculate_confidence(
         self,
-        data: pd.DataFrame,
+        volumes: Optional[np.ndarray],
         sma_50: float,
         sma_200: float,
         current_price: float,
@@ -654,20 +833,21 @@ class TechnicalAnalyzer:
             trend_strength = min(1, ma_distance * 10)
             volume_confirmation = 1.0
             
-            if 'Volume' in data.columns:
-                avg_volume = data['Volume'].tail(20).mean()
-                current_volume = data['Volume'].iloc[-1]
+            if volumes is not None:
+                avg_volume = np.nanmean(volumes[-20:])
+                current_volume = volumes[-1]
                 volume_confirmation = min(1.0, current_volume / avg_volume) if avg_volume > 0 else 1.0
             
-            raw_score = sum([
-                20 * above_50ma,
-                20 * above_200ma,
-                10 * rsi_not_overbought,
-                10 * rsi_not_oversold,
-                15 * low_volatility,
-                15 * trend_strength,
-                10 * volume_confirmation
-            ])
+            # Plain weighted sum; no temporary list per call
+            raw_score = (
+                20 * above_50ma
+                + 20 * above_200ma
+                + 10 * rsi_not_overbought
+                + 10 * rsi_not_oversold
+                + 15 * low_volatility
+                + 15 * trend_strength
+                + 10 * volume_confirmation
+            )
             return min(100, max(0, raw_score))
         except Exception:
             return 50.0
@@ -701,6 +881,23 @@ class TechnicalAnalyzer:
 # Institutional Analysis Engine
 # ============================================================================
 
+# Only the selected recommendation's summary is rendered per analysis
+_SUMMARY_TEMPLATES = {
+    Recommendation.STRONG_BUY: "Strong buy opportunity for {symbol} at ${price:.2f}. "
+                               "Technical indicators show bullish momentum with RSI at {rsi:.1f} ({rsi_status}).",
+    Recommendation.BUY: "Buy signal for {symbol} at ${price:.2f}. "
+                        "Price action positive with RSI at {rsi:.1f}.",
+    Recommendation.HOLD: "Hold {symbol} at ${price:.2f}. "
+                         "Mixed signals with RSI at {rsi:.1f} ({rsi_status}). "
+                         "Market regime: {regime}.",
+    Recommendation.SELL: "Sell signal for {symbol} at ${price:.2f}. "
+                         "Weak technicals with RSI at {rsi:.1f}.",
+    Recommendation.STRONG_SELL: "Strong sell signal for {symbol} at ${price:.2f}. "
+                                "Bearish indicators across the board with RSI at {rsi:.1f}.",
+}
+# Indexed by (rsi >= 30) + (rsi > 70)
+_RSI_STATUS = ("oversold", "neutral", "overbought")
+
 class InstitutionalAnalysisEngine:
     """
     Main analysis engine that combines technical analysis with LSTM predictions.
@@ -720,7 +917,7 @@ class InstitutionalAnalysisEngine:
     
     def _validate_symbol(self):
         """Validate stock symbol format."""
-        if not re.match(r'^[A-Z]{1,5}$', self.symbol):
+        if not _is_valid_symbol(self.symbol):
             raise ValueError(f"Invalid stock symbol format: {self.symbol}")
     
     def full_analysis(self, news_text: str = "") -> Dict[str, Any]:
@@ -733,24 +930,27 @@ class InstitutionalAnalysisEngine:
         Returns:
             Complete analysis result dictionary
         """
+        # One timestamp per analysis, shared by every part of the response
+        self._now_iso = datetime.datetime.utcnow().isoformat() + "Z"
         try:
+            # Technicals and the LSTM prediction are independent network-bound
+            # fetches; overlap them so wall time is the slower of the two.
+            lstm_future = _LSTM_EXECUTOR.submit(_with_db_cleanup, self._get_lstm_prediction, news_text)
             technicals = self.technical_analyzer.analyze(self.symbol)
+            lstm_prediction = lstm_future.result()
+
             if technicals.current_price <= 0:
                 logger.warning(f"Fallback price still zero for {self.symbol}, forcing default")
                 technicals = self.technical_analyzer._get_fallback_metrics(self.symbol)
             
             result = self._format_response(technicals)
-            
-            # Add LSTM prediction
-            result['lstm_prediction'] = self._get_lstm_prediction(news_text)
+            result['lstm_prediction'] = lstm_prediction
             
             return result
             
         except Exception as e:
             logger.error(f"Analysis failed for {self.symbol}: {str(e)}")
             return self._error_response(str(e))
-        finally:
-            gc.collect()
     
     def _get_lstm_prediction(self, news_text: str) -> Dict[str, Any]:
         """Get LSTM prediction with error handling."""
@@ -799,7 +999,7 @@ class InstitutionalAnalysisEngine:
             },
             "confidence": round(technicals.confidence, 1),
             "risk_profile": self.risk_type.value,
-            "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+            "timestamp": self._now_iso,
             "summary": self._generate_summary(technicals, recommendation)
         }
     
@@ -833,29 +1033,24 @@ class InstitutionalAnalysisEngine:
     def _generate_summary(self, technicals: TechnicalMetrics, recommendation: Recommendation) -> str:
         """Generate a human-readable summary."""
         price = technicals.current_price
-        rsi_status = "overbought" if technicals.rsi > 70 else "oversold" if technicals.rsi < 30 else "neutral"
-        
-        summaries = {
-            Recommendation.STRONG_BUY: f"Strong buy opportunity for {self.symbol} at ${price:.2f}. "
-                                      f"Technical indicators show bullish momentum with RSI at {technicals.rsi:.1f} ({rsi_status}).",
-            Recommendation.BUY: f"Buy signal for {self.symbol} at ${price:.2f}. "
-                               f"Price action positive with RSI at {technicals.rsi:.1f}.",
-            Recommendation.HOLD: f"Hold {self.symbol} at ${price:.2f}. "
-                                f"Mixed signals with RSI at {technicals.rsi:.1f} ({rsi_status}). "
-                                f"Market regime: {technicals.market_regime.regime.value}.",
-            Recommendation.SELL: f"Sell signal for {self.symbol} at ${price:.2f}. "
-                                f"Weak technicals with RSI at {technicals.rsi:.1f}.",
-            Recommendation.STRONG_SELL: f"Strong sell signal for {self.symbol} at ${price:.2f}. "
-                                        f"Bearish indicators across the board with RSI at {technicals.rsi:.1f}."
-        }
-        return summaries.get(recommendation, f"Analysis complete for {self.symbol} at ${price:.2f}")
+        template = _SUMMARY_TEMPLATES.get(recommendation)
+        if template is None:
+            return f"Analysis complete for {self.symbol} at ${price:.2f}"
+        rsi = technicals.rsi
+        return template.format(
+            symbol=self.symbol,
+            price=price,
+            rsi=rsi,
+            rsi_status=_RSI_STATUS[(rsi >= 30) + (rsi > 70)],
+            regime=technicals.market_regime.regime.value,
+        )
     
     def _error_response(self, message: str) -> Dict[str, Any]:
         """Generate error response."""
         return {
             "error": message,
             "symbol": self.symbol,
-            "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+            "timestamp": self._now_iso,
             "status": "failed"
         }
 
@@ -923,7 +1118,7 @@ def format_investment_analysis(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
                 "success": False,
                 "error": analysis_data["error"],
                 "symbol": analysis_data.get("symbol", "UNKNOWN"),
-                "timestamp": analysis_data.get("timestamp", datetime.datetime.utcnow().isoformat() + "Z")
+                "timestamp": analysis_data.get("timestamp") or datetime.datetime.utcnow().isoformat() + "Z"
             }
         
         symbol = analysis_data.get("symbol", "UNKNOWN")
@@ -946,10 +1141,8 @@ def format_investment_analysis(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
                 "summary",
                 f"{symbol}: {recommendation} with {confidence}% confidence"
             ),
-            "timestamp": analysis_data.get(
-                "timestamp",
-                datetime.datetime.utcnow().isoformat() + "Z"
-            ),
+            # Reuse the analysis timestamp; only stamp anew when it is missing
+            "timestamp": analysis_data.get("timestamp") or datetime.datetime.utcnow().isoformat() + "Z",
             "metadata": {
                 "version": "5.3",
                 "provider": "Institutional Analysis Engine"
@@ -976,6 +1169,33 @@ def format_investment_analysis(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
         }
 
 
+_THESIS_BULLISH = (
+    "Investment thesis for {symbol}: Technical indicators suggest bullish momentum "
+    "with RSI at {rsi:.1f} and volatility at {volatility:.1f}%. "
+    "The {market_regime} market regime supports this view. "
+    "Confidence level: {confidence:.1f}%."
+)
+_THESIS_BEARISH = (
+    "Investment thesis for {symbol}: Technical indicators suggest bearish momentum "
+    "with RSI at {rsi:.1f} indicating potential downside. "
+    "Consider reducing exposure given {market_regime} market conditions. "
+    "Confidence level: {confidence:.1f}%."
+)
+_THESIS_HOLD = (
+    "Investment thesis for {symbol}: Mixed signals suggest maintaining current position. "
+    "RSI at {rsi:.1f} indicates neutral momentum. "
+    "Wait for clearer direction in {market_regime} market. "
+    "Confidence level: {confidence:.1f}%."
+)
+_BULLISH_RECOMMENDATIONS = frozenset({"STRONG_BUY", "BUY"})
+_THESIS_TEMPLATES = {
+    "STRONG_BUY": _THESIS_BULLISH,
+    "BUY": _THESIS_BULLISH,
+    "STRONG_SELL": _THESIS_BEARISH,
+    "SELL": _THESIS_BEARISH,
+}
+
+
 def _generate_investment_thesis(
     symbol: str,
     recommendation: str,
@@ -989,30 +1209,16 @@ def _generate_investment_thesis(
     volatility = indicators.get("volatility", 20)
     market_regime = regime.get("regime", "neutral")
     
-    if recommendation in ["STRONG_BUY", "BUY"]:
-        thesis = (
-            f"Investment thesis for {symbol}: Technical indicators suggest bullish momentum "
-            f"with RSI at {rsi:.1f} and volatility at {volatility:.1f}%. "
-            f"The {market_regime} market regime supports this view. "
-            f"Confidence level: {confidence:.1f}%."
-        )
-        if confidence > 80:
-            thesis += " Strong conviction based on multiple confirming indicators."
-            
-    elif recommendation in ["STRONG_SELL", "SELL"]:
-        thesis = (
-            f"Investment thesis for {symbol}: Technical indicators suggest bearish momentum "
-            f"with RSI at {rsi:.1f} indicating potential downside. "
-            f"Consider reducing exposure given {market_regime} market conditions. "
-            f"Confidence level: {confidence:.1f}%."
-        )
-    else:
-        thesis = (
-            f"Investment thesis for {symbol}: Mixed signals suggest maintaining current position. "
-            f"RSI at {rsi:.1f} indicates neutral momentum. "
-            f"Wait for clearer direction in {market_regime} market. "
-            f"Confidence level: {confidence:.1f}%."
-        )
+    ctx = {
+        "symbol": symbol,
+        "rsi": rsi,
+        "volatility": volatility,
+        "market_regime": market_regime,
+        "confidence": confidence,
+    }
+    thesis = _THESIS_TEMPLATES.get(recommendation, _THESIS_HOLD).format_map(ctx)
+    if recommendation in _BULLISH_RECOMMENDATIONS and confidence > 80:
+        thesis += " Strong conviction based on multiple confirming indicators."
     
     return thesis
 
@@ -1023,7 +1229,7 @@ def _generate_investment_thesis(
 
 def validate_symbol(symbol: str) -> bool:
     """Validate stock symbol format."""
-    return bool(re.match(r'^[A-Z]{1,5}$', symbol.upper()))
+    return _is_valid_symbol(symbol.upper())
 
 
 def clear_all_caches():
@@ -4,13 +4,28 @@ from .models import StockOpinion, Prediction, Subscription, ModelPerformanceSnap
 class StockOpinionSerializer(serializers.ModelSerializer):
     class Meta:
         model = StockOpinion
-        fields = '__all__'
-        read_only_fields = ['timestamp']
+        # Explicit list (same columns and order as '__all__') so DRF does not
+        # enumerate the model's fields for every serializer it builds
+        fields = [
+            'id', 'symbol', 'timestamp', 'action', 'horizon',
+            'technical_confidence', 'sentiment_confidence', 'composite_confidence',
+            'explanation', 'factors', 'risk_metrics', 'contrarian_warnings',
+            'historical_accuracy', 'news_data',
+        ]
+        read_only_fields = ['id', 'timestamp']
 
 class PredictionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Prediction
-        fields = '__all__'
+        # Same columns and order as '__all__', listed explicitly
+        fields = [
+            'id', 'date', 'stock_symbol', 'headline', 'sentiment_score',
+            'predicted_movement', 'confidence', 'actual_movement', 'created_at',
+            'source', 'user', 'price_at_prediction', 'price_at_resolution',
+            'actual_direction', 'is_correct', 'resolution_date', 'time_to_resolution',
+            'price_change_percent', 'shap_values', 'feature_importance',
+            'prediction_explanation', 'market_context',
+        ]
         read_only_fields = ['id', 'created_at']
 
 class SubscriptionSerializer(serializers.ModelSerializer):
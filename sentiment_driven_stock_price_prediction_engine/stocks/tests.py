@@ -1,3 +1,127 @@
-from django.test import TestCase
+import random
+from collections import Counter
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from .opinion_generator import TechnicalAnalyzer, _wilder_weights
+from .utils import _metrics_from_counts, _tally_confusion_cells
+from .views import latest_rsi
+
+
+def _reference_metrics(pairs):
+    """The per-row confusion_matrix path _tally_confusion_cells replaced."""
+    y_true, y_pred = [], []
+    for actual, predicted in pairs:
+        if actual in ['up', 'down']:
+            y_true.append(1 if actual == 'up' else 0)
+            y_pred.append(1 if predicted == 'up' else 0)
+    if not y_true:
+        return _metrics_from_counts({'TP': 0, 'FP': 0, 'TN': 0, 'FN': 0})
+    # Same cell order as confusion_matrix(y_true, y_pred, labels=[0, 1]).ravel()
+    tn, fp, fn, tp = np.bincount(2 * np.array(y_true) + np.array(y_pred), minlength=4)
+    accuracy = (tp + tn) / (tp + tn + fp + fn)
+    precision = tp / (tp + fp) if (tp + fp) > 0 else 0
+    recall = tp / (tp + fn) if (tp + fn) > 0 else 0
+    f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
+    balanced_accuracy = (recall + (tn / (tn + fp) if (tn + fp) > 0 else 0)) / 2
+    return {
+        'accuracy': round(accuracy * 100, 1),
+        'precision': round(precision * 100, 1),
+        'recall': round(recall * 100, 1),
+        'f1': round(f1 * 100, 1),
+        'balanced_accuracy': round(balanced_accuracy * 100, 1),
+        'confusion_matrix': {'TP': tp, 'FP': fp, 'TN': tn, 'FN': fn}
+    }
+
+
+def _group_by_cells(pairs):
+    """Rows as .values('actual_direction', 'predicted_movement').annotate(n=Count('id'))."""
+    return [
+        {'actual_direction': actual, 'predicted_movement': predicted, 'n': n}
+        for (actual, predicted), n in Counter(pairs).items()
+    ]
+
+
+def _pandas_rsi(close, window=14):
+    """The rolling-mean RSI latest_rsi replaced, as computed in the views."""
+    delta = pd.Series(close).diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
+    rs = gain / loss
+    return float(100 - (100 / (1 + rs.iloc[-1]))) if rs.iloc[-1] != 0 else 50.0
+
+
+class ConfusionTallyTests(SimpleTestCase):
+    def test_matches_per_row_confusion_matrix(self):
+        rng = random.Random(7)
+        for size in (1, 5, 50, 500):
+            pairs = [
+                (rng.choice(['up', 'down', 'neutral', None]), rng.choice(['up', 'down', 'neutral']))
+                for _ in range(size)
+            ]
+            self.assertEqual(
+                _metrics_from_counts(_tally_confusion_cells(_group_by_cells(pairs))),
+                _reference_metrics(pairs),
+            )
+
+    def test_only_neutral_outcomes_give_zero_metrics(self):
+        pairs = [('neutral', 'up'), ('neutral', 'down')]
+        metrics = _metrics_from_counts(_tally_confusion_cells(_group_by_cells(pairs)))
+        self.assertEqual(metrics, _reference_metrics(pairs))
+        self.assertEqual(metrics['accuracy'], 0)
+
+    def test_per_symbol_tally_accumulates_into_counts(self):
+        counts = {'TP': 0, 'FP': 0, 'TN': 0, 'FN': 0}
+        for row in _group_by_cells([('up', 'up'), ('up', 'up'), ('down', 'up'), ('down', 'neutral')]):
+            _tally_confusion_cells((row,), counts)
+        self.assertEqual(counts, {'TP': 2, 'FP': 1, 'TN': 1, 'FN': 0})
+
+
+class LatestRsiTests(SimpleTestCase):
+    def test_matches_pandas_rolling_rsi(self):
+        rng = np.random.default_rng(3)
+        for length in (15, 30, 130):
+            close = 100 + np.cumsum(rng.normal(0, 1, length))
+            self.assertAlmostEqual(latest_rsi(close), _pandas_rsi(close), places=9)
+
+    def test_no_gains_is_fifty(self):
+        close = np.linspace(120, 100, 30)
+        self.assertEqual(latest_rsi(close), 50.0)
+        self.assertEqual(_pandas_rsi(close), 50.0)
+
+    def test_no_losses_is_hundred(self):
+        close = np.linspace(100, 120, 30)
+        self.assertEqual(latest_rsi(close), _pandas_rsi(close))
+        self.assertEqual(latest_rsi(close), 100.0)
+
+
+class WilderSmoothingTests(SimpleTestCase):
+    def test_wilder_last_matches_ewm(self):
+        rng = np.random.default_rng(11)
+        for length in (1, 2, 14, 251):
+            values = rng.random(length)
+            for alpha in (1 / 14, 0.5):
+                expected = pd.Series(values).ewm(alpha=alpha, adjust=False).mean().iloc[-1]
+                self.assertAlmostEqual(TechnicalAnalyzer._wilder_last(values, alpha), expected, places=9)
+
+    def test_rsi_matches_ewm_rsi(self):
+        rng = np.random.default_rng(5)
+        close = 100 + np.cumsum(rng.normal(0, 1, 252))
+        delta = pd.Series(close).diff()
+        avg_gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean().iloc[-1]
+        avg_loss = (-delta.clip(upper=0)).ewm(alpha=1 / 14, adjust=False).mean().iloc[-1]
+        expected = 100 - (100 / (1 + avg_gain / avg_loss))
+        analyzer = TechnicalAnalyzer.__new__(TechnicalAnalyzer)
+        self.assertAlmostEqual(analyzer._calculate_rsi(close), expected, places=9)
+
+    def test_cached_weights_are_shared_and_read_only(self):
+        rng = np.random.default_rng(13)
+        first, second = rng.random(60), rng.random(60)
+        for values in (first, second):
+            expected = pd.Series(values).ewm(alpha=1 / 14, adjust=False).mean().iloc[-1]
+            self.assertAlmostEqual(TechnicalAnalyzer._wilder_last(values, 1 / 14), expected, places=9)
+        weights = _wilder_weights(60, 1 / 14)
+        self.assertIs(weights, _wilder_weights(60, 1 / 14))
+        self.assertFalse(weights.flags.writeable)
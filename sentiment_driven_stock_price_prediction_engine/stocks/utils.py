@@ -1,4 +1,5 @@
 import yfinance as yf
+import pandas as pd
 import logging
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -7,19 +8,9 @@ from django.db.models import Q, Count, Sum, Avg
 from .models import Prediction
 import time
 from django.core.cache import cache
+from django.utils import timezone
 from functools import wraps
 
-# Optional imports for performance metrics
-try:
-    from sklearn.metrics import confusion_matrix, precision_score, recall_score, f1_score
-    import numpy as np
-    import yfinance as yf
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    SKLEARN_AVAILABLE = False
-    logger = logging.getLogger(__name__)
-    logger.warning("sklearn, numpy, or yfinance not installed. Performance metrics will be limited.")
-
 logger = logging.getLogger(__name__)
 
 
@@ -147,7 +138,7 @@ def fetch_yfinance_price(symbol, target_date):
     ticker = yf.Ticker(symbol)
     start = target_date - timedelta(days=2)
     end = target_date + timedelta(days=2)
-    hist = ticker.history(start=start, end=end)
+    hist = ticker.history(start=start, end=end, actions=False)
     if hist.empty:
         return None
     hist.index = hist.index.normalize()
@@ -159,6 +150,40 @@ def fetch_yfinance_price(symbol, target_date):
     price = float(hist.loc[hist.index.date == closest_date, 'Close'].iloc[0])
     return price
 
+
+@retry_on_rate_limit(max_retries=3, delay=2)
+def fetch_yfinance_closes(symbols, start, end):
+    """
+    Daily closes for several symbols from one yf.download request.
+    Returns a DataFrame with one column per symbol (end is exclusive).
+    """
+    data = yf.download(
+        list(dict.fromkeys(symbols)),
+        start=start,
+        end=end,
+        progress=False,
+        auto_adjust=True,
+        group_by='column',
+    )
+    if data.empty:
+        return None
+    closes = data['Close']
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(symbols[0])
+    closes.index = pd.DatetimeIndex(closes.index).normalize()
+    return closes
+
+
+def _close_on_or_before(closes, target_date, lookback_days=2):
+    """Latest close within lookback_days up to target_date, as fetch_yfinance_price picks it."""
+    if closes is None:
+        return None
+    dates = closes.index.date
+    window = closes[(dates <= target_date) & (dates >= target_date - timedelta(days=lookback_days))].dropna()
+    if window.empty:
+        return None
+    return float(window.iloc[-1])
+
 # ============================================================
 # – PREDICTION RESOLUTION & METRICS
 # ============================================================
@@ -169,13 +194,32 @@ def resolve_prediction(prediction, resolution_days=7):
     """
     try:
         resolution_date = prediction.date + timedelta(days=resolution_days)
+        symbol = prediction.stock_symbol
+        spy_cache_key = f"spy_price_{resolution_date.strftime('%Y%m%d')}"
+
+        pred_price = get_cached_price(symbol, prediction.date)
+        res_price = get_cached_price(symbol, resolution_date)
+        spy_data = cache.get(spy_cache_key)
+
+        # Anything missing from the cache comes from one multi-ticker
+        # download covering both price lookups and the SPY range, instead
+        # of up to three separate Ticker.history requests
+        closes = None
+        if pred_price is None or res_price is None or spy_data is None:
+            try:
+                closes = fetch_yfinance_closes(
+                    [symbol, "SPY"],
+                    start=prediction.date - timedelta(days=2),
+                    end=resolution_date + timedelta(days=2),
+                )
+            except Exception as e:
+                logger.warning(f"Price download failed for {symbol}: {e}")
 
         # Get price at prediction time (cached)
-        pred_price = get_cached_price(prediction.stock_symbol, prediction.date)
-        if pred_price is None:
-            pred_price = fetch_yfinance_price(prediction.stock_symbol, prediction.date)
+        if pred_price is None and closes is not None and symbol in closes:
+            pred_price = _close_on_or_before(closes[symbol], prediction.date)
             if pred_price is not None:
-                set_cached_price(prediction.stock_symbol, prediction.date, pred_price)
+                set_cached_price(symbol, prediction.date, pred_price)
         if pred_price is None:
             if prediction.price_at_prediction:
                 pred_price = float(prediction.price_at_prediction)
@@ -185,11 +229,10 @@ def resolve_prediction(prediction, resolution_days=7):
         prediction.price_at_prediction = Decimal(str(pred_price))
 
         # Get price at resolution date (cached)
-        res_price = get_cached_price(prediction.stock_symbol, resolution_date)
-        if res_price is None:
-            res_price = fetch_yfinance_price(prediction.stock_symbol, resolution_date)
+        if res_price is None and closes is not None and symbol in closes:
+            res_price = _close_on_or_before(closes[symbol], resolution_date)
             if res_price is not None:
-                set_cached_price(prediction.stock_symbol, resolution_date, res_price)
+                set_cached_price(symbol, resolution_date, res_price)
         if res_price is None:
             logger.warning(f"No price data for {prediction.stock_symbol} on {resolution_date}")
             return False
@@ -211,17 +254,17 @@ def resolve_prediction(prediction, resolution_days=7):
             prediction.price_change_percent = Decimal(str(round(change, 2)))
 
         # Add SPY context (cached)
-        spy_cache_key = f"spy_price_{resolution_date.strftime('%Y%m%d')}"
-        spy_data = cache.get(spy_cache_key)
-        if spy_data is None:
-            spy = yf.Ticker("SPY")
-            spy_hist = spy.history(start=prediction.date, end=resolution_date)
-            if not spy_hist.empty:
-                spy_return = (spy_hist['Close'].iloc[-1] / spy_hist['Close'].iloc[0] - 1) * 100
+        if spy_data is None and closes is not None and "SPY" in closes:
+            spy_dates = closes.index.date
+            spy_close = closes["SPY"][
+                (spy_dates >= prediction.date) & (spy_dates < resolution_date)
+            ].dropna()
+            if not spy_close.empty:
+                spy_return = (spy_close.iloc[-1] / spy_close.iloc[0] - 1) * 100
                 spy_data = {
                     'spy_return': round(spy_return, 2),
-                    'spy_price_start': float(spy_hist['Close'].iloc[0]),
-                    'spy_price_end': float(spy_hist['Close'].iloc[-1]),
+                    'spy_price_start': float(spy_close.iloc[0]),
+                    'spy_price_end': float(spy_close.iloc[-1]),
                 }
                 cache.set(spy_cache_key, spy_data, timeout=60*60*24*7)
         prediction.market_context = spy_data or {}
@@ -246,59 +289,29 @@ def resolve_prediction(prediction, resolution_days=7):
         return False
 
 
-def calculate_performance_metrics(queryset):
+def _tally_confusion_cells(rows, counts=None):
     """
-    Calculate precision, recall, f1, confusion matrix from queryset.
-    
-    Args:
-        queryset: QuerySet of Prediction objects (must have is_correct and actual_direction)
-        
-    Returns:
-        dict: Performance metrics including accuracy, precision, recall, f1, confusion matrix
+    Fold (actual_direction, predicted_movement, n) GROUP BY rows into
+    TP/FP/TN/FN counts. Neutral outcomes are ignored; any non-'up'
+    prediction counts as 'down'.
     """
-    if not SKLEARN_AVAILABLE:
-        logger.warning("sklearn not available – returning empty metrics")
-        return {
-            'accuracy': 0,
-            'precision': 0,
-            'recall': 0,
-            'f1': 0,
-            'balanced_accuracy': 0,
-            'confusion_matrix': {'TP': 0, 'FP': 0, 'TN': 0, 'FN': 0}
-        }
-    
-    if queryset.count() == 0:
-        return {
-            'accuracy': 0,
-            'precision': 0,
-            'recall': 0,
-            'f1': 0,
-            'balanced_accuracy': 0,
-            'confusion_matrix': {'TP': 0, 'FP': 0, 'TN': 0, 'FN': 0}
-        }
-    
-    # Only include resolved predictions
-    resolved = queryset.filter(is_correct__isnull=False)
-    if resolved.count() == 0:
-        return {
-            'accuracy': 0,
-            'precision': 0,
-            'recall': 0,
-            'f1': 0,
-            'balanced_accuracy': 0,
-            'confusion_matrix': {'TP': 0, 'FP': 0, 'TN': 0, 'FN': 0}
-        }
-    
-    # Extract actual and predicted
-    y_true = []
-    y_pred = []
-    for pred in resolved:
-        # Map direction to binary (up=1, down=0, neutral ignored)
-        if pred.actual_direction in ['up', 'down']:
-            y_true.append(1 if pred.actual_direction == 'up' else 0)
-            y_pred.append(1 if pred.predicted_movement == 'up' else 0)
-    
-    if len(y_true) == 0:
+    counts = counts if counts is not None else {'TP': 0, 'FP': 0, 'TN': 0, 'FN': 0}
+    for row in rows:
+        actual = row['actual_direction']
+        if actual not in ('up', 'down'):
+            continue
+        predicted_up = row['predicted_movement'] == 'up'
+        if actual == 'up':
+            counts['TP' if predicted_up else 'FN'] += row['n']
+        else:
+            counts['FP' if predicted_up else 'TN'] += row['n']
+    return counts
+
+
+def _metrics_from_counts(counts):
+    """Derive the metrics dict from confusion-matrix counts."""
+    tp, fp, tn, fn = counts['TP'], counts['FP'], counts['TN'], counts['FN']
+    if tp + fp + tn + fn == 0:
         return {
             'accuracy': 0,
             'precision': 0,
@@ -308,8 +321,7 @@ def calculate_performance_metrics(queryset):
             'confusion_matrix': {'TP': 0, 'FP': 0, 'TN': 0, 'FN': 0}
         }
     
-    tn, fp, fn, tp = confusion_matrix(y_true, y_pred, labels=[0, 1]).ravel()
-    accuracy = (tp + tn) / (tp + tn + fp + fn) if (tp + tn + fp + fn) > 0 else 0
+    accuracy = (tp + tn) / (tp + tn + fp + fn)
     precision = tp / (tp + fp) if (tp + fp) > 0 else 0
     recall = tp / (tp + fn) if (tp + fn) > 0 else 0
     f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
@@ -325,6 +337,53 @@ def calculate_performance_metrics(queryset):
     }
 
 
+def calculate_performance_metrics(queryset):
+    """
+    Calculate precision, recall, f1, confusion matrix from queryset.
+    
+    Args:
+        queryset: QuerySet of Prediction objects (must have is_correct and actual_direction)
+        
+    Returns:
+        dict: Performance metrics including accuracy, precision, recall, f1, confusion matrix
+    """
+    # Let the database build the 2x2 confusion matrix: one GROUP BY over
+    # (actual, predicted) of the resolved predictions returns at most a
+    # handful of rows. No COUNT() pre-checks: an empty queryset yields no groups.
+    cells = (
+        queryset.filter(is_correct__isnull=False, actual_direction__in=['up', 'down'])
+        .order_by()
+        .values('actual_direction', 'predicted_movement')
+        .annotate(n=Count('id'))
+    )
+    return _metrics_from_counts(_tally_confusion_cells(cells))
+
+
+def calculate_performance_metrics_by_symbol(queryset):
+    """
+    Per-symbol variant of calculate_performance_metrics in a single query.
+    
+    Args:
+        queryset: QuerySet of Prediction objects
+        
+    Returns:
+        dict: {symbol: metrics} for every symbol with resolved predictions
+    """
+    cells = (
+        queryset.filter(is_correct__isnull=False)
+        .order_by()
+        .values('stock_symbol', 'actual_direction', 'predicted_movement')
+        .annotate(n=Count('id'))
+    )
+    counts_by_symbol = {}
+    for row in cells:
+        counts = counts_by_symbol.setdefault(
+            row['stock_symbol'], {'TP': 0, 'FP': 0, 'TN': 0, 'FN': 0}
+        )
+        _tally_confusion_cells((row,), counts)
+    return {sym: _metrics_from_counts(counts) for sym, counts in counts_by_symbol.items()}
+
+
 def detect_drift(recent_period_days=30, baseline_period_days=90):
     """
     Detect performance drift by comparing recent vs baseline F1.
@@ -336,8 +395,6 @@ def detect_drift(recent_period_days=30, baseline_period_days=90):
     Returns:
         dict: Drift detection results including severity and metrics
     """
-    from django.utils import timezone
-    
     recent_start = timezone.now() - timedelta(days=recent_period_days)
     baseline_start = timezone.now() - timedelta(days=baseline_period_days)
     
@@ -393,8 +450,10 @@ def resolve_all_pending_predictions(resolution_days=7):
         is_correct__isnull=True,
         date__lte=cutoff_date
     )
-    results = {'total': pending.count(), 'resolved': 0, 'failed': 0}
-    for idx, pred in enumerate(pending):
+    results = {'total': 0, 'resolved': 0, 'failed': 0}
+    # Stream the rows in one query instead of COUNT + full fetch
+    for idx, pred in enumerate(pending.iterator(chunk_size=200)):
+        results['total'] += 1
         if idx > 0:
             time.sleep(1.5)  # delay between calls
         success = resolve_prediction(pred, resolution_days)
@@ -2,6 +2,8 @@
 Stock analysis views – unified dashboard, technical indicators, LSTM predictions,
 subscription, and history. All endpoints are documented via OpenAPI (Swagger).
 """
+import random
+import dateutil.parser
 import yfinance as yf
 import numpy as np
 import pandas as pd
@@ -16,7 +18,7 @@ from datetime import datetime
 from authentication.utils import error_response, success_response
 from datetime import datetime, timedelta
 from django.utils import timezone  
-from django.db.models import F
+from django.db.models import Count, F, Q
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
@@ -40,10 +42,32 @@ from .serializers import (
 )
 from news.models import ProcessedNews
 from .lstm_predictor import get_lstm_predictor
-from .utils import save_prediction, calculate_performance_metrics, detect_drift
+from .cache_utils import get_cached_price_data
+from .utils import (
+    save_prediction, calculate_performance_metrics,
+    calculate_performance_metrics_by_symbol, detect_drift
+)
 
 logger = logging.getLogger(__name__)
 
+# Tier-1 news outlets counted in SentimentAnalysisView's source stats;
+# sorted array form is built once for np.isin
+TIER1_SOURCES = frozenset({'Reuters', 'Bloomberg', 'CNBC', 'Wall Street Journal', 'Financial Times'})
+_TIER1_ARR = np.array(sorted(TIER1_SOURCES), dtype=object)
+
+def latest_rsi(close: np.ndarray, window: int = 14) -> float:
+    """
+    Last value of the simple-average RSI (rolling mean of gains/losses),
+    computed from the final window + 1 closes only. NaN if the window has
+    gaps; 50.0 when the average gain is zero.
+    """
+    delta = np.diff(close[-(window + 1):])
+    gain = np.where(delta > 0, delta, 0.0).mean()
+    loss = np.where(delta < 0, -delta, 0.0).mean()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = gain / loss
+    return float(100 - (100 / (1 + rs))) if rs != 0 else 50.0
+
 def calculate_technical_indicators(symbol):
     """
     Fetch real technical indicators using yfinance.
@@ -53,55 +77,52 @@ def calculate_technical_indicators(symbol):
     """
     try:
         ticker = yf.Ticker(symbol)
-        hist = ticker.history(period="6mo")  # enough for 200-day SMA
+        hist = ticker.history(period="6mo", actions=False)  # enough for 200-day SMA
         if hist.empty or len(hist) < 10:
             return None
 
-        current_price = float(hist['Close'].iloc[-1])
-        price_history = [round(float(p), 2) for p in hist['Close'].tolist()]
-
-        # SMA 50 – if data insufficient, compute SMA of all available data
-        if len(hist) >= 50:
-            sma_50 = float(hist['Close'].rolling(window=50).mean().iloc[-1])
-            if np.isnan(sma_50):
-                sma_50 = float(hist['Close'].mean())
-        else:
-            sma_50 = float(hist['Close'].mean())
-
-        # SMA 200 – if data insufficient, compute SMA of all available data
-        if len(hist) >= 200:
-            sma_200 = float(hist['Close'].rolling(window=200).mean().iloc[-1])
-            if np.isnan(sma_200):
-                sma_200 = float(hist['Close'].mean())
-        else:
-            sma_200 = float(hist['Close'].mean())
-
-        # RSI (14-day) – if insufficient data, fallback to 50
-        if len(hist) >= 15:
-            delta = hist['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = float(100 - (100 / (1 + rs.iloc[-1]))) if rs.iloc[-1] != 0 else 50.0
+        # Pull the four columns out once as float64 arrays; each indicator
+        # below only needs its latest value, so read it off the array tail
+        # instead of building full-length rolling Series
+        close, high, low, volumes = (
+            hist[['Close', 'High', 'Low', 'Volume']].to_numpy(dtype=np.float64).T
+        )
+        n = len(close)
+        current_price = float(close[-1])
+        price_history = [round(p, 2) for p in close.tolist()]
+        full_mean = float(np.nanmean(close))
+
+        # SMA 50 / SMA 200 – if data insufficient (or the window has gaps),
+        # use the SMA of all available data
+        sma_50 = float(close[-50:].mean()) if n >= 50 else full_mean
+        if np.isnan(sma_50):
+            sma_50 = full_mean
+        sma_200 = float(close[-200:].mean()) if n >= 200 else full_mean
+        if np.isnan(sma_200):
+            sma_200 = full_mean
+
+        # RSI (14-day simple averages) – if insufficient data, fallback to 50
+        if n >= 15:
+            rsi = latest_rsi(close)
             if np.isnan(rsi):
                 rsi = 50.0
         else:
             rsi = 50.0
 
         # Support / Resistance (20-day high/low)
-        recent = hist.tail(20)
-        support = float(recent['Low'].min()) if not recent.empty else current_price * 0.9
-        resistance = float(recent['High'].max()) if not recent.empty else current_price * 1.1
+        support = float(np.nanmin(low[-20:]))
+        resistance = float(np.nanmax(high[-20:]))
 
         # Pivot Point
-        pivot = float((recent['High'].iloc[-1] + recent['Low'].iloc[-1] + current_price) / 3) if not recent.empty else current_price
+        pivot = float((high[-1] + low[-1] + current_price) / 3)
 
         # Volume
-        volume = int(hist['Volume'].iloc[-1]) if not hist.empty else 0
+        volume = int(volumes[-1])
 
         # Volatility (daily returns std dev)
-        returns = hist['Close'].pct_change().dropna()
-        volatility = float(returns.std() * 100) if len(returns) > 1 else 0.0
+        returns = np.diff(close) / close[:-1]
+        returns = returns[~np.isnan(returns)]
+        volatility = float(returns.std(ddof=1) * 100) if len(returns) > 1 else 0.0
         if np.isnan(volatility):
             volatility = 0.0
 
@@ -168,6 +189,36 @@ def get_fallback_analysis(symbol: str, risk_type: str = "medium", hold_time: str
         "riskAssessment": {"level": risk_type, "horizon": hold_time}
     }
 
+def recent_price_history(symbol: str) -> pd.DataFrame:
+    """
+    Roughly one month of daily bars. Reuses the price frame the technical
+    analyzer cached in Redis for this symbol, and only downloads when that
+    entry is missing.
+    """
+    cached = get_cached_price_data(symbol)
+    if cached is not None and not cached.empty:
+        if isinstance(cached.columns, pd.MultiIndex):
+            cached = cached.set_axis(cached.columns.get_level_values(0), axis=1)
+        return cached.tail(22)  # ~1 month of trading days
+    return yf.Ticker(symbol).history(period="1mo", actions=False)
+
+# Static fallback technicals for popular symbols (optional, but gives better
+# fallback values); built once at import rather than on every fallback call
+FALLBACK_TECHNICAL_DATA = {
+    "AAPL": {"price": 116.16, "sma50": 114.84, "sma200": 111.81, "rsi": 70.8, "support": 110.35, "resistance": 121.97, "volume": 12424000, "volatility": 0.15},
+    "MSFT": {"price": 420.50, "sma50": 418.20, "sma200": 410.00, "rsi": 65.0, "support": 400.0, "resistance": 430.0, "volume": 8000000, "volatility": 0.12},
+    "NVDA": {"price": 130.00, "sma50": 128.50, "sma200": 125.00, "rsi": 60.0, "support": 120.0, "resistance": 140.0, "volume": 15000000, "volatility": 0.25},
+    "GOOGL": {"price": 180.00, "sma50": 178.00, "sma200": 175.00, "rsi": 58.0, "support": 170.0, "resistance": 190.0, "volume": 5000000, "volatility": 0.10},
+    "AMZN": {"price": 190.00, "sma50": 188.00, "sma200": 185.00, "rsi": 55.0, "support": 180.0, "resistance": 200.0, "volume": 6000000, "volatility": 0.18},
+    "META": {"price": 510.00, "sma50": 505.00, "sma200": 500.00, "rsi": 62.0, "support": 490.0, "resistance": 520.0, "volume": 4000000, "volatility": 0.14},
+    "TSLA": {"price": 250.00, "sma50": 245.00, "sma200": 240.00, "rsi": 70.0, "support": 230.0, "resistance": 260.0, "volume": 3000000, "volatility": 0.35},
+    "JPM": {"price": 160.00, "sma50": 158.00, "sma200": 155.00, "rsi": 50.0, "support": 150.0, "resistance": 170.0, "volume": 2000000, "volatility": 0.08},
+    "IBM": {"price": 180.00, "sma50": 178.00, "sma200": 175.00, "rsi": 52.0, "support": 170.0, "resistance": 190.0, "volume": 1500000, "volatility": 0.09},
+    "PLTR": {"price": 132.38, "sma50": 132.48, "sma200": 155.64, "rsi": 53.0, "support": 120.0, "resistance": 145.0, "volume": 31841300, "volatility": 1.8},
+    "NFLX": {"price": 620.00, "sma50": 615.00, "sma200": 600.00, "rsi": 65.0, "support": 590.0, "resistance": 650.0, "volume": 2000000, "volatility": 0.20},
+    "VTI": {"price": 250.00, "sma50": 248.00, "sma200": 245.00, "rsi": 55.0, "support": 240.0, "resistance": 260.0, "volume": 3000000, "volatility": 0.12},
+}
+
 def get_fallback_technical(symbol: str) -> dict:
     """
     Generate realistic fallback technical data when yfinance fails.
@@ -181,28 +232,11 @@ def get_fallback_technical(symbol: str) -> dict:
     """
     symbol = symbol.upper()
 
-    # Static data for popular symbols (optional, but gives better fallback values)
-    STATIC_DATA = {
-        "AAPL": {"price": 116.16, "sma50": 114.84, "sma200": 111.81, "rsi": 70.8, "support": 110.35, "resistance": 121.97, "volume": 12424000, "volatility": 0.15},
-        "MSFT": {"price": 420.50, "sma50": 418.20, "sma200": 410.00, "rsi": 65.0, "support": 400.0, "resistance": 430.0, "volume": 8000000, "volatility": 0.12},
-        "NVDA": {"price": 130.00, "sma50": 128.50, "sma200": 125.00, "rsi": 60.0, "support": 120.0, "resistance": 140.0, "volume": 15000000, "volatility": 0.25},
-        "GOOGL": {"price": 180.00, "sma50": 178.00, "sma200": 175.00, "rsi": 58.0, "support": 170.0, "resistance": 190.0, "volume": 5000000, "volatility": 0.10},
-        "AMZN": {"price": 190.00, "sma50": 188.00, "sma200": 185.00, "rsi": 55.0, "support": 180.0, "resistance": 200.0, "volume": 6000000, "volatility": 0.18},
-        "META": {"price": 510.00, "sma50": 505.00, "sma200": 500.00, "rsi": 62.0, "support": 490.0, "resistance": 520.0, "volume": 4000000, "volatility": 0.14},
-        "TSLA": {"price": 250.00, "sma50": 245.00, "sma200": 240.00, "rsi": 70.0, "support": 230.0, "resistance": 260.0, "volume": 3000000, "volatility": 0.35},
-        "JPM": {"price": 160.00, "sma50": 158.00, "sma200": 155.00, "rsi": 50.0, "support": 150.0, "resistance": 170.0, "volume": 2000000, "volatility": 0.08},
-        "IBM": {"price": 180.00, "sma50": 178.00, "sma200": 175.00, "rsi": 52.0, "support": 170.0, "resistance": 190.0, "volume": 1500000, "volatility": 0.09},
-        "PLTR": {"price": 132.38, "sma50": 132.48, "sma200": 155.64, "rsi": 53.0, "support": 120.0, "resistance": 145.0, "volume": 31841300, "volatility": 1.8},
-        "NFLX": {"price": 620.00, "sma50": 615.00, "sma200": 600.00, "rsi": 65.0, "support": 590.0, "resistance": 650.0, "volume": 2000000, "volatility": 0.20},
-        "VTI": {"price": 250.00, "sma50": 248.00, "sma200": 245.00, "rsi": 55.0, "support": 240.0, "resistance": 260.0, "volume": 3000000, "volatility": 0.12},
-    }
-
     # If symbol is in static map, use that data
-    if symbol in STATIC_DATA:
-        data = STATIC_DATA[symbol]
+    data = FALLBACK_TECHNICAL_DATA.get(symbol)
+    if data is not None:
         price = data["price"]
         # Generate a 30-day price history around the current price
-        import random
         random.seed(hash(symbol) % 2**32)  # deterministic per symbol
         base = price
         price_history = []
@@ -237,7 +271,6 @@ def get_fallback_technical(symbol: str) -> dict:
     # Use a reasonable default price (e.g., 100.0)
     base_price = 100.0
     # Add some variation based on symbol hash
-    import random
     random.seed(hash(symbol) % 2**32)
     # Price between $20 and $500
     price = round(random.uniform(20, 500), 2)
@@ -396,15 +429,22 @@ class StockOpinionView(APIView):
         detail_level = request.query_params.get("detail_level", "summary")
         
         try:
-            # ✅ Lazy import 
-            from .opinion_generator import generate_stock_opinion, format_investment_analysis
-            
-            opinion = generate_stock_opinion(symbol=symbol, risk_type=risk_type)
-            if "error" in opinion:
-                return Response(opinion, status=status.HTTP_400_BAD_REQUEST)
+            # hold_time/detail_level are only echoed back, so one cached
+            # analysis serves every combination of them
+            cache_key = f"stock_opinion_{symbol.upper()}_{risk_type}"
+            formatted_opinion = cache.get(cache_key)
+            if formatted_opinion is None:
+                # ✅ Lazy import 
+                from .opinion_generator import generate_stock_opinion, format_investment_analysis
+                
+                opinion = generate_stock_opinion(symbol=symbol, risk_type=risk_type)
+                if "error" in opinion:
+                    return Response(opinion, status=status.HTTP_400_BAD_REQUEST)
+                
+                formatted_opinion = format_investment_analysis(opinion)
+                cache.set(cache_key, formatted_opinion, timeout=300)
             
-            formatted_opinion = format_investment_analysis(opinion)
-            formatted_opinion['hold_time'] = hold_time
+            formatted_opinion = {**formatted_opinion, 'hold_time': hold_time}
             formatted_opinion['detail_level'] = detail_level
             
             if request.query_params.get("format", "json").lower() == "text":
@@ -608,21 +648,23 @@ class StockAnalysisView(APIView):
                 'recent_articles': 0
             }
             try:
-                news_items = ProcessedNews.objects.filter(symbol=symbol).order_by('-published_at')[:10]
-                if news_items.exists():
-                    scores = [n.sentiment_score for n in news_items if n.sentiment_score is not None]
-                    if scores:
-                        avg_score = sum(scores) / len(scores)
-                        sentiment_summary['score'] = round(avg_score, 4)
-                        if avg_score > 0.2:
-                            sentiment_summary['overall'] = 'Bullish'
-                        elif avg_score < -0.2:
-                            sentiment_summary['overall'] = 'Bearish'
-                        else:
-                            sentiment_summary['overall'] = 'Neutral'
-                        sentiment_summary['recent_articles'] = len(scores)
+                # One query for just the score column (no exists() round-trip)
+                scores = [
+                    score for score in ProcessedNews.objects.filter(symbol=symbol)
+                    .order_by('-published_at')
+                    .values_list('sentiment_score', flat=True)[:10]
+                    if score is not None
+                ]
+                if scores:
+                    avg_score = sum(scores) / len(scores)
+                    sentiment_summary['score'] = round(avg_score, 4)
+                    if avg_score > 0.2:
+                        sentiment_summary['overall'] = 'Bullish'
+                    elif avg_score < -0.2:
+                        sentiment_summary['overall'] = 'Bearish'
                     else:
-                        sentiment_summary['score'] = 0.5
+                        sentiment_summary['overall'] = 'Neutral'
+                    sentiment_summary['recent_articles'] = len(scores)
                 else:
                     sentiment_summary['score'] = 0.5
             except Exception as e:
@@ -633,20 +675,14 @@ class StockAnalysisView(APIView):
             # Use the same logic as TechnicalIndicatorsView to ensure consistency
             tech_data = None
             try:
-                # Try yfinance directly
-                import yfinance as yf
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period="1mo")  # at least 20 days for support/resistance
+                # Same bars generate_stock_opinion just fetched; yfinance only on a miss
+                hist = recent_price_history(symbol)  # at least 20 days for support/resistance
                 if not hist.empty and len(hist) >= 20:
-                    current_price = float(hist['Close'].iloc[-1])
-                    sma50 = float(hist['Close'].rolling(window=50).mean().iloc[-1]) if len(hist) >= 50 else 0.0
-                    sma200 = float(hist['Close'].rolling(window=200).mean().iloc[-1]) if len(hist) >= 200 else 0.0
-                    # RSI
-                    delta = hist['Close'].diff()
-                    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                    rs = gain / loss
-                    rsi = float(100 - (100 / (1 + rs.iloc[-1]))) if rs.iloc[-1] != 0 else 50.0
+                    close = hist['Close'].to_numpy(dtype=np.float64)
+                    current_price = float(close[-1])
+                    sma50 = float(close[-50:].mean()) if len(close) >= 50 else 0.0
+                    sma200 = float(close[-200:].mean()) if len(close) >= 200 else 0.0
+                    rsi = latest_rsi(close)
                     support = float(hist['Low'].tail(20).min())
                     resistance = float(hist['High'].tail(20).max())
                     volume = int(hist['Volume'].iloc[-1])
@@ -720,7 +756,6 @@ class StockAnalysisView(APIView):
 
             # ---------- LSTM PREDICTION ----------
             try:
-                from .lstm_predictor import get_lstm_predictor
                 predictor = get_lstm_predictor()
                 lstm_result = predictor.predict(symbol)
                 if lstm_result.get('success', False):
@@ -840,49 +875,50 @@ class TechnicalIndicatorsView(APIView):
             days = days_map.get(timeframe, 30)
 
             ticker = yf.Ticker(symbol)
-            hist = ticker.history(period=f"{days}d")
+            hist = ticker.history(period=f"{days}d", actions=False)
 
             if hist.empty:
                 raise ValueError("No historical data returned from yfinance")
 
+            # All four columns as float64 arrays in one pass; everything
+            # below reads array tails instead of Series/.iloc lookups
+            close, high, low, volumes = (
+                hist[['Close', 'High', 'Low', 'Volume']].to_numpy(dtype=np.float64).T
+            )
+
             # Current price
-            current_price = float(hist['Close'].iloc[-1])
+            current_price = float(close[-1])
 
             # Price history
-            price_history = [round(float(p), 2) for p in hist['Close'].tolist()]
+            price_history = [round(p, 2) for p in close.tolist()]
 
             # SMAs
             sma_50 = 0
             sma_200 = 0
-            if len(hist) >= 50:
-                sma_50 = round(float(hist['Close'].rolling(window=50).mean().iloc[-1]), 2)
-            if len(hist) >= 200:
-                sma_200 = round(float(hist['Close'].rolling(window=200).mean().iloc[-1]), 2)
+            if len(close) >= 50:
+                sma_50 = round(float(close[-50:].mean()), 2)
+            if len(close) >= 200:
+                sma_200 = round(float(close[-200:].mean()), 2)
 
             # RSI (14-day)
             rsi = 0
-            if len(hist) >= 15:
-                delta = hist['Close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                rsi = round(100 - (100 / (1 + rs.iloc[-1])), 1) if rs.iloc[-1] != 0 else 50
+            if len(close) >= 15:
+                rsi = round(latest_rsi(close), 1)
 
             # Support & Resistance (20-day high/low)
-            recent = hist.tail(20)
-            support = round(float(recent['Low'].min()), 2) if not recent.empty else 0
-            resistance = round(float(recent['High'].max()), 2) if not recent.empty else 0
+            support = round(float(np.nanmin(low[-20:])), 2)
+            resistance = round(float(np.nanmax(high[-20:])), 2)
 
             # Pivot Point (standard)
-            last = hist.tail(1)
-            pivot = round(float((last['High'].iloc[-1] + last['Low'].iloc[-1] + last['Close'].iloc[-1]) / 3), 2) if not last.empty else 0
+            pivot = round(float((high[-1] + low[-1] + close[-1]) / 3), 2)
 
             # Volume
-            volume = int(hist['Volume'].iloc[-1]) if not hist.empty else 0
+            volume = int(volumes[-1])
 
             # Volatility (daily returns std dev)
-            returns = hist['Close'].pct_change().dropna()
-            volatility = round(float(returns.std() * 100), 2) if len(returns) > 1 else 0
+            returns = np.diff(close) / close[:-1]
+            returns = returns[~np.isnan(returns)]
+            volatility = round(float(returns.std(ddof=1) * 100), 2) if len(returns) > 1 else 0
 
             response_data = {
                 "technical": {
@@ -1195,12 +1231,16 @@ class SentimentAnalysisView(APIView):
         try:
             # Fetch recent news for sentiment analysis
             cutoff = datetime.now() - timedelta(days=days)
-            news_items = ProcessedNews.objects.filter(
+            # Plain tuples of the five columns used below, in one query
+            news_rows = list(ProcessedNews.objects.filter(
                 symbol=symbol.upper(),
                 published_at__gte=cutoff
-            ).order_by('-published_at')[:100]
+            ).order_by('-published_at').values_list(
+                'sentiment_score', 'source_name', 'provider',
+                'source_reliability', 'published_at',
+            )[:100])
             
-            if not news_items.exists():
+            if not news_rows:
                 # Return neutral sentiment with no news
                 response_data = {
                     "sentiment": {
@@ -1221,12 +1261,16 @@ class SentimentAnalysisView(APIView):
                     status=status.HTTP_200_OK
                 )
             
-            # Calculate sentiment scores
-            scores = [n.sentiment_score for n in news_items if n.sentiment_score is not None]
-            valid_scores = [s for s in scores if s is not None]
+            # Transpose the rows into per-column arrays once; every aggregate
+            # below is a reduction over these instead of a per-row loop
+            score_col, source_name_col, provider_col, reliability_col, published_col = zip(*news_rows)
             
-            if valid_scores:
-                avg_score = sum(valid_scores) / len(valid_scores)
+            # Calculate sentiment scores (NULL scores become NaN and are skipped)
+            scores = np.array(score_col, dtype=np.float64)
+            valid = ~np.isnan(scores)
+            
+            if valid.any():
+                avg_score = float(scores[valid].mean())
                 if avg_score > 0.2:
                     label = "Bullish"
                 elif avg_score < -0.2:
@@ -1238,26 +1282,23 @@ class SentimentAnalysisView(APIView):
                 label = "Neutral"
             
             # Build source statistics
-            reliable_sources = ['Reuters', 'Bloomberg', 'CNBC', 'Wall Street Journal', 'Financial Times']
-            tier1_sources = []
-            reliability_sum = 0
-            tier1_count = 0
-            
-            for item in news_items[:50]:
-                source = item.source_name or item.provider or ''
-                if source in reliable_sources:
-                    tier1_sources.append(source)
-                    tier1_count += 1
-                    reliability_sum += item.source_reliability or 70
+            sources = np.array(
+                [name or provider or '' for name, provider in zip(source_name_col[:50], provider_col[:50])],
+                dtype=object,
+            )
+            tier1_mask = np.isin(sources, _TIER1_ARR)
+            reliabilities = np.array(reliability_col[:50], dtype=np.float64)
+            reliabilities[(reliabilities == 0) | np.isnan(reliabilities)] = 70
+            tier1_sources = sources[tier1_mask].tolist()
+            tier1_count = int(tier1_mask.sum())
+            reliability_sum = float(reliabilities[tier1_mask].sum())
             
             # Build history data (last 7 or 30 days)
-            history = []
-            for item in news_items[:min(days, len(news_items))]:
-                if item.sentiment_score is not None:
-                    history.append({
-                        "date": item.published_at.isoformat(),
-                        "score": round(item.sentiment_score, 4)
-                    })
+            history = [
+                {"date": published_at.isoformat(), "score": round(score, 4)}
+                for score, published_at in zip(score_col[:days], published_col[:days])
+                if score is not None
+            ]
             
             # Sort history by date
             history.sort(key=lambda x: x['date'])
@@ -1267,7 +1308,7 @@ class SentimentAnalysisView(APIView):
                     "score": round(avg_score, 4),
                     "label": label
                 },
-                "news_count": len(news_items),
+                "news_count": len(news_rows),
                 "source_stats": {
                     "tier1_count": tier1_count,
                     "reliability_sum": round(reliability_sum, 1) if reliability_sum > 0 else 0,
@@ -1316,16 +1357,16 @@ class PredictionListView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request):
-        import dateutil.parser
-
         symbol = request.query_params.get('symbol')
         date_from = request.query_params.get('date_from')
         date_to = request.query_params.get('date_to')
         outcome = request.query_params.get('outcome')  # 'correct', 'incorrect'
-        limit = int(request.query_params.get('limit', 50))
+        limit = min(int(request.query_params.get('limit', 50)), 200)
         offset = int(request.query_params.get('offset', 0))
         
-        qs = Prediction.objects.all().order_by('-date')
+        # Columns the serializer doesn't read (user FK, actual_movement)
+        # are left out of the SELECT
+        qs = Prediction.objects.defer('user', 'actual_movement').order_by('-date')
         
         if symbol:
             qs = qs.filter(stock_symbol=symbol.upper())
@@ -1384,20 +1425,18 @@ class PerformanceSummaryView(APIView):
         
         metrics = calculate_performance_metrics(qs)
         
-        # Per-symbol breakdown
-        symbols = qs.values_list('stock_symbol', flat=True).distinct()
-        symbol_metrics = {}
-        for sym in symbols:
-            sym_qs = qs.filter(stock_symbol=sym)
-            symbol_metrics[sym] = calculate_performance_metrics(sym_qs)
-        
-        # Total counts
-        total_preds = qs.count()
-        correct_preds = qs.filter(is_correct=True).count()
+        # Per-symbol breakdown (one GROUP BY instead of a query per symbol)
+        symbol_metrics = calculate_performance_metrics_by_symbol(qs)
         
-        # ✅ ADD THIS - Get resolved predictions count
-        resolved_qs = qs.filter(is_correct__isnull=False)
-        total_resolved = resolved_qs.count()
+        # Total counts in one aggregate; qs is already limited to resolved
+        # predictions, so resolved == total
+        totals = qs.aggregate(
+            total=Count('id'),
+            correct=Count('id', filter=Q(is_correct=True)),
+        )
+        total_preds = totals['total']
+        correct_preds = totals['correct']
+        total_resolved = total_preds
 
         # Recent accuracy (last 7 days)
         recent_start = datetime.now() - timedelta(days=7)
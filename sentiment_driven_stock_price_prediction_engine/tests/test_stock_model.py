@@ -4,7 +4,7 @@ import pandas as pd
 # Load trained model
 MODEL_PATH = "models/stock_price_predictor.pkl"
 try:
-    model = joblib.load(MODEL_PATH)
+    model = joblib.load(MODEL_PATH, mmap_mode="r")
     print("✅ Stock prediction model loaded successfully.")
 except Exception as e:
     print("❌ ERROR: Model could not be loaded!", str(e))
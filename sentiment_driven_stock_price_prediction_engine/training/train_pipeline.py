@@ -11,6 +11,7 @@ Hardware: 8GB RAM, 256GB SSD, no GPU → optimized for CPU.
 
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import torch
 import torch.nn as nn
 import torch.optim as optim
@@ -18,13 +19,15 @@ from transformers import pipeline
 from sklearn.metrics import accuracy_score, f1_score
 from sklearn.model_selection import train_test_split
 from tqdm.auto import tqdm  # For progress bar
-tqdm.pandas()  # Enable progress_apply for pandas
 
 # ----------------------------
 # Filepaths (adjust as needed)
 # ----------------------------
 STOCK_DATA_PATH = "./data/ibm_cleaned.parquet"    
 MODEL_SAVE_PATH = "./models/stock_prediction_model.pth"
+SENTIMENT_CHUNK_SIZE = 256  # headlines per pipeline call (progress bar step)
+SENTIMENT_BATCH_SIZE = 64   # headlines per forward pass
+FEATURE_COLUMNS = ("sentiment_score", "MA7", "MA21", "STD21", "RSI14", "UpperBB", "LowerBB")
 
 # ----------------------------
 # 1. Data Preparation Functions
@@ -56,40 +59,62 @@ def add_sentiment_scores(df: pd.DataFrame) -> pd.DataFrame:
         "text-classification",
         model="ProsusAI/finbert",          # or "distilbert-base-uncased-finetuned-sst-2-english"
         device=device,
-        batch_size=16                      # Increase if memory allows (e.g., 32)
+        framework='pt',
+        batch_size=SENTIMENT_BATCH_SIZE,
+        truncation=True,
+        max_length=512,
     )
 
-    # Initialize FinBERT pipeline (using CPU: device=-1)
-    sentiment_model = pipeline("text-classification", model="ProsusAI/finbert", device=-1, framework='pt')
-
-    def get_sentiment(text: str) -> float:
-        # Return neutral (0.0) if missing text.
-        if not isinstance(text, str) or text.strip() == "":
-            return 0.0
-        truncated_text = text[:512]
-        result = sentiment_model(truncated_text)[0]
-        score = result.get("score", 0.0)
-        # Assign positive score if label is positive; else, negative.
-        return score if result["label"].lower() == "positive" else -score
-
-    # Use progress_apply to display a progress bar while processing sentiment scores.
-    df["sentiment_score"] = df["News"].fillna("").progress_apply(get_sentiment)
+    # Missing/blank headlines stay neutral (0.0); the rest go through the
+    # pipeline in batches rather than one call per row
+    news = df["News"].to_numpy(dtype=object)
+    has_text = np.fromiter(
+        (isinstance(text, str) and text.strip() != "" for text in news),
+        dtype=bool, count=len(news),
+    )
+    rows = np.flatnonzero(has_text)
+    texts = [news[i][:512] for i in rows]
+
+    results = []
+    chunk = SENTIMENT_CHUNK_SIZE
+    for start in tqdm(range(0, len(texts), chunk), desc="Sentiment"):
+        results.extend(sentiment_model(texts[start:start + chunk]))
+
+    # Positive label keeps its score; any other label is negated
+    confidence = np.fromiter((r.get("score", 0.0) for r in results), dtype=np.float64, count=len(results))
+    sign = np.fromiter(
+        (1.0 if r["label"].lower() == "positive" else -1.0 for r in results),
+        dtype=np.float64, count=len(results),
+    )
+    scores = np.zeros(len(news), dtype=np.float64)
+    scores[rows] = confidence * sign
+    df["sentiment_score"] = scores
     return df
 
 def add_technical_indicators(df: pd.DataFrame) -> pd.DataFrame:
     """Compute moving averages, standard deviation, RSI, and Bollinger Bands."""
     df["MA7"] = df["Close"].rolling(window=7).mean()
-    df["MA21"] = df["Close"].rolling(window=21).mean()
-    df["STD21"] = df["Close"].rolling(window=21).std()
+    # One rolling window object for the 21-day mean/std; both Bollinger
+    # bands reuse STD21 instead of recomputing it
+    roll21 = df["Close"].rolling(window=21)
+    df["MA21"] = roll21.mean()
+    df["STD21"] = roll21.std()
     
-    def compute_rsi(series: pd.Series, window: int = 14) -> pd.Series:
-        delta = series.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
+    def compute_rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+        # Simple-average RSI, as stocks/lstm_predictor.py computes it at
+        # inference time. Gains and losses are stacked into one (n, 2) array
+        # and both window means come from a single strided view, with no
+        # intermediate Series (the leading NaN delta becomes 0, as with .where())
+        delta = np.diff(close, prepend=np.nan)
+        moves = np.stack((np.where(delta > 0, delta, 0.0), np.where(delta < 0, -delta, 0.0)), axis=1)
+        rsi = np.full(len(close), np.nan)
+        if len(close) >= window:
+            means = sliding_window_view(moves, window, axis=0).mean(axis=-1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rsi[window - 1:] = 100 - (100 / (1 + means[:, 0] / means[:, 1]))
+        return rsi
     
-    df["RSI14"] = compute_rsi(df["Close"])
+    df["RSI14"] = compute_rsi(df["Close"].to_numpy(dtype=float))
     df["UpperBB"] = df["MA21"] + (df["STD21"] * 2)
     df["LowerBB"] = df["MA21"] - (df["STD21"] * 2)
     return df
@@ -99,13 +124,23 @@ def prepare_training_data(df: pd.DataFrame):
     Create features and target variable.
       - Features: sentiment_score and technical indicators.
       - Target: next-day price movement (1 if price increases, 0 otherwise).
+    Returns (X, y, valid): X is a C-contiguous float32 (rows, features)
+    array and y an int8 array, both for the rows of df flagged in the bool
+    mask valid (those with every indicator defined).
     """
-    df["Price_Change"] = (df["Close"].shift(-1) > df["Close"]).astype(int)
-    feature_columns = ["sentiment_score", "MA7", "MA21", "STD21", "RSI14", "UpperBB", "LowerBB"]
-    df = df.dropna(subset=feature_columns + ["Price_Change"])
-    X = df[feature_columns]
-    y = df["Price_Change"]
-    return X, y
+    # One compare of the close array against itself shifted by a day,
+    # written straight into an int8 array (the last row has no next day: 0)
+    close = df["Close"].to_numpy(dtype=float)
+    price_change = np.zeros(len(close), dtype=np.int8)
+    np.greater(close[1:], close[:-1], out=price_change[:-1].view(np.bool_))
+    # Each indicator column is written straight into one float32 matrix (the
+    # LSTM trains in float32), and warm-up rows are dropped with a mask
+    # rather than a DataFrame dropna/astype copy
+    features = np.empty((len(df), len(FEATURE_COLUMNS)), dtype=np.float32)
+    for j, column in enumerate(FEATURE_COLUMNS):
+        features[:, j] = df[column].to_numpy()
+    valid = ~np.isnan(features).any(axis=1)
+    return features[valid], price_change[valid], valid
 
 # ----------------------------
 # 2. Model Architecture: LSTM for Classification
@@ -121,19 +156,28 @@ class LSTMModel(nn.Module):
         _, (hidden, _) = self.lstm(x)
         return self.fc(hidden[-1])
 
-def train_model(X_train: pd.DataFrame, y_train: pd.Series, input_size: int, epochs: int = 20, batch_size: int = 32):
+def train_model(X_train: np.ndarray, y_train: np.ndarray, input_size: int, epochs: int = 20, batch_size: int = 32):
     model = LSTMModel(input_size=input_size, hidden_size=32, output_size=1)
     optimizer = optim.Adam(model.parameters(), lr=0.001)
     loss_fn = nn.BCEWithLogitsLoss()
 
-    X_train_tensor = torch.tensor(X_train.values, dtype=torch.float32).unsqueeze(1)
-    y_train_tensor = torch.tensor(y_train.values, dtype=torch.float32)
+    # X is already contiguous float32 (prepare_training_data), so this is a view
+    X_train_tensor = torch.from_numpy(X_train).unsqueeze(1)
+    y_train_tensor = torch.from_numpy(y_train.astype(np.float32))
+
+    # bfloat16 autocast on CPUs with native bf16 matmul (AVX512-BF16 / AMX);
+    # weights and the loss stay float32, so no grad scaler is needed
+    try:
+        use_bf16 = torch.ops.mkldnn._is_mkldnn_bf16_supported()
+    except Exception:
+        use_bf16 = False
 
     model.train()
     for epoch in range(epochs):
         optimizer.zero_grad()
-        outputs = model(X_train_tensor).squeeze()
-        loss = loss_fn(outputs, y_train_tensor)
+        with torch.autocast("cpu", dtype=torch.bfloat16, enabled=use_bf16):
+            outputs = model(X_train_tensor).squeeze()
+            loss = loss_fn(outputs.float(), y_train_tensor)
         loss.backward()
         optimizer.step()
         print(f"Epoch {epoch+1}/{epochs}, Loss: {loss.item():.4f}")
@@ -157,17 +201,18 @@ def main():
     df = add_technical_indicators(df)
     print("Computed technical indicators.")
     
-    X, y = prepare_training_data(df)
+    X, y, valid = prepare_training_data(df)
     print("Prepared training data. Features shape:", X.shape)
     
     # Temporal Split Example:
     # Train: 2008-2018, Validation: 2019, Test: 2020-2023
-    df["Year"] = df["Date"].dt.year
-    train_df = df[df["Year"] <= 2018]
-    val_df = df[df["Year"] == 2019]
-    test_df = df[df["Year"] >= 2020]
-    X_train, y_train = prepare_training_data(train_df)
-    X_val, y_val = prepare_training_data(val_df)
+    # Split the prepared X/y by year masks rather than re-running
+    # prepare_training_data (shift, dropna, column copy) on each slice
+    year = df["Date"].dt.year.to_numpy()[valid]
+    train_mask = year <= 2018
+    val_mask = year == 2019
+    X_train, y_train = X[train_mask], y[train_mask]
+    X_val, y_val = X[val_mask], y[val_mask]
     
     input_size = X_train.shape[1]
     model = train_model(X_train, y_train, input_size)
@@ -176,7 +221,7 @@ def main():
     print(f"Model saved to {MODEL_SAVE_PATH}")
     
     # Evaluate on validation set
-    X_val_tensor = torch.tensor(X_val.values, dtype=torch.float32).unsqueeze(1)
+    X_val_tensor = torch.from_numpy(X_val).unsqueeze(1)
     model.eval()
     with torch.no_grad():
         val_outputs = model(X_val_tensor).squeeze()